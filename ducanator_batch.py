@@ -0,0 +1,206 @@
+import argparse
+import csv
+import glob
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from ducanator_core import Engine, MarkIndex, entry_price, load_inventory, memory, metrics
+
+SUMMARY_FIELDS = ["account", "file", "parts", "quantity", "ducats", "platinum", "unpriced", "tradeable", "full_trades"]
+PART_FIELDS = ["account", "name", "category", "amount", "ducats", "platinum_each", "platinum", "marked"]
+
+_worker_index = None
+
+def _init_worker(index):
+    global _worker_index
+    _worker_index = index
+
+def _resolve_file(path):
+    try:
+        return path, _worker_index.resolve(load_inventory(path)), None
+    except Exception as e:
+        return path, None, str(e)
+
+def find_inventories(inputs):
+    paths = []
+    for pattern in inputs:
+        if os.path.isdir(pattern):
+            matches = glob.glob(os.path.join(pattern, "**", "*.json"), recursive=True)
+        elif glob.has_magic(pattern):
+            matches = glob.glob(pattern, recursive=True)
+        else:
+            matches = [pattern]
+        for path in sorted(matches):
+            path = os.path.abspath(path)
+            if path not in paths:
+                paths.append(path)
+    return paths
+
+def account_name(path, taken):
+    stem = os.path.splitext(os.path.basename(path))[0]
+    if stem.lower() == "inventory":
+        # accounts/<name>/inventory.json
+        stem = os.path.basename(os.path.dirname(path)) or stem
+    name = stem
+    suffix = 2
+    while name in taken:
+        name = f"{stem}-{suffix}"
+        suffix += 1
+    taken.add(name)
+    return name
+
+def value_account(account, path, parts, prices, marks):
+    if marks is not None:
+        marks.set_items(parts)
+    rows = []
+    summary = {field: 0 for field in SUMMARY_FIELDS}
+    summary["account"] = account
+    summary["file"] = path
+    summary["parts"] = len(parts)
+    for part in parts:
+        price = prices.get(part["name"])
+        marked = marks is not None and marks.is_marked(part["name"], part.get("base_name"))
+        amount = part["amount"]
+        summary["quantity"] += amount
+        summary["ducats"] += amount * part["cost"]
+        if price is None:
+            summary["unpriced"] += 1
+        else:
+            summary["platinum"] += amount * price
+        if not marked:
+            summary["tradeable"] += amount
+        rows.append({
+            "account": account,
+            "name": part["name"],
+            "category": part["category"],
+            "amount": amount,
+            "ducats": part["cost"],
+            "platinum_each": price,
+            "platinum": amount * price if price is not None else None,
+            "marked": marked
+        })
+    summary["full_trades"] = summary["tradeable"] // 6
+    return summary, rows
+
+def aggregate(summaries):
+    total = {field: 0 for field in SUMMARY_FIELDS}
+    total["account"] = "ALL"
+    total["file"] = ""
+    for summary in summaries:
+        for field in ("parts", "quantity", "ducats", "platinum", "unpriced", "tradeable", "full_trades"):
+            total[field] += summary[field]
+    return total
+
+def write_csv(path, fields, rows):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=fields)
+        writer.writeheader()
+        writer.writerows(rows)
+
+def run(args):
+    inventory_files = find_inventories(args.inputs)
+    if not inventory_files:
+        print("No inventory files found", file=sys.stderr)
+        return 1
+    
+    if args.metrics:
+        metrics.enabled = True
+    if args.memory:
+        memory.start()
+    engine = Engine(args.base_dir)
+    try:
+        catalog = engine.load_catalog()
+        if not catalog.loaded_files:
+            print(f"No category JSON files found in {engine.cached_data_dir}", file=sys.stderr)
+            return 1
+        index = engine.catalog_index()
+        
+        resolved = []
+        if args.workers == 1:
+            _init_worker(index)
+            resolved = [_resolve_file(path) for path in inventory_files]
+        else:
+            # The catalog index is shipped to each worker once, not once per inventory
+            with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker, initargs=(index,)) as pool:
+                resolved = list(pool.map(_resolve_file, inventory_files, chunksize=4))
+        
+        accounts = []
+        all_parts = []
+        taken = set()
+        for path, parts, error in resolved:
+            if error is not None:
+                print(f"Error loading {path}: {error}", file=sys.stderr)
+                continue
+            accounts.append((account_name(path, taken), path, parts))
+            all_parts.extend(parts)
+        
+        if args.fetch:
+            engine.price_parts(all_parts, force_refresh=args.force_refresh)
+        snapshot = engine.prices.snapshot()
+        prices = {part["name"]: entry_price(snapshot.get(part["name"])) for part in all_parts}
+    finally:
+        engine.close()
+    
+    marks = None
+    if args.marks:
+        marks = MarkIndex()
+        with open(args.marks, 'r', encoding='utf-8') as f:
+            marks.load_json(json.load(f))
+    
+    summaries = []
+    part_rows = []
+    for account, path, parts in accounts:
+        summary, rows = value_account(account, path, parts, prices, marks)
+        summaries.append(summary)
+        part_rows.extend(rows)
+    total = aggregate(summaries)
+    
+    os.makedirs(args.out, exist_ok=True)
+    formats = set(args.format.split(","))
+    if "csv" in formats:
+        write_csv(os.path.join(args.out, "summary.csv"), SUMMARY_FIELDS, summaries + [total])
+        write_csv(os.path.join(args.out, "parts.csv"), PART_FIELDS, part_rows)
+    if "json" in formats:
+        report = {
+            "accounts": [
+                dict(summary, items=[row for row in part_rows if row["account"] == summary["account"]])
+                for summary in summaries
+            ],
+            "aggregate": total
+        }
+        with open(os.path.join(args.out, "report.json"), 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    if metrics.enabled:
+        # Resolving happens in worker processes, so only the parent's stages show up here
+        with open(os.path.join(args.out, "metrics.json"), 'w', encoding='utf-8') as f:
+            json.dump(metrics.to_json(), f, indent=2)
+    if args.memory:
+        # Taken once everything is valued, so it shows what stays alive rather than the peak
+        usage = memory.take()
+        with open(os.path.join(args.out, "memory.json"), 'w', encoding='utf-8') as f:
+            json.dump(usage, f, indent=2)
+        print(memory.report(usage))
+    
+    for summary in summaries + [total]:
+        print(f"{summary['account']:<24} {summary['quantity']:>6} parts  {summary['ducats']:>8} ducats  "
+              f"{summary['platinum']:>8} plat  {summary['full_trades']:>4} full trades")
+    return 0
+
+def main():
+    parser = argparse.ArgumentParser(description="Value many inventory.json files without starting the GUI")
+    parser.add_argument("inputs", nargs="+", help="inventory JSON files, directories or glob patterns")
+    parser.add_argument("--out", default="reports", help="directory for summary.csv, parts.csv and report.json")
+    parser.add_argument("--format", default="csv,json", help="comma separated: csv, json")
+    parser.add_argument("--workers", type=int, default=None, help="processes used to resolve inventories (default: CPU count)")
+    parser.add_argument("--fetch", action="store_true", help="fetch missing or expired prices before valuing")
+    parser.add_argument("--force-refresh", action="store_true", help="with --fetch, refetch every price")
+    parser.add_argument("--marks", help="marked_items.json whose marks exclude parts from full trades")
+    parser.add_argument("--metrics", action="store_true", help="write stage timings and fetch counters to metrics.json")
+    parser.add_argument("--memory", action="store_true", help="trace allocations and write what each part of the program holds to memory.json")
+    parser.add_argument("--base-dir", default=None, help="folder holding cachedData/ and settings.json")
+    return run(parser.parse_args())
+
+if __name__ == "__main__":
+    sys.exit(main())
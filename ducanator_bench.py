@@ -0,0 +1,328 @@
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from ducanator_core import (
+    CatalogIndex,
+    MarkIndex,
+    TradeCounter,
+    calculate_reasonable_price,
+    category_file_paths,
+    filter_view_items,
+    flat_view_rows,
+    flatten_inventory,
+    load_catalog,
+    summarize_orders,
+    summary_sell_prices,
+    write_json_atomic
+)
+
+RESULTS_VERSION = 1
+
+# 1× is shaped like the shipped cachedData: (items in the file, primes among them, parts of each prime)
+CATALOG_SHAPE = {
+    "Warframes.json": (110, 55, ["Neuroptics", "Chassis", "Systems"]),
+    "Primary.json": (189, 32, ["Barrel", "Receiver", "Stock"]),
+    "Secondary.json": (147, 30, ["Barrel", "Receiver", "Link"]),
+    "Melee.json": (264, 39, ["Blade", "Handle"]),
+    "Sentinels.json": (17, 6, ["Cerebrum", "Carapace", "Systems"]),
+    "SentinelWeapons.json": (24, 6, []),
+    "Arch-Gun.json": (20, 2, ["Barrel", "Receiver", "Stock"]),
+    "Arch-Melee.json": (8, 0, []),
+    "Archwing.json": (5, 1, ["Harness", "Wings", "Systems"])
+}
+
+DUCAT_VALUES = [15, 25, 45, 65, 100]
+
+# Inventory entries that aren't prime parts, per 1×
+NOISE_SHAPE = {
+    "MiscItems": 400,
+    "Recipes": 150,
+    "RawUpgrades": 900,
+    "LongGuns": 120,
+    "Suits": 60
+}
+
+VIEW_CONFIGS = {
+    "all": {},
+    "filtered": {"category": "Primary", "show_marked": False, "search_text": "prime b", "ducat_filter": "45"},
+    "sorted": {"amount_sort": 2, "platinum_sort": 1}
+}
+
+def _filler(rnd, words):
+    return " ".join(rnd.choice(("orokin", "void", "relic", "tenno", "lotus", "grineer", "corpus", "sentient"))
+                    for _ in range(words))
+
+def _drops(rnd):
+    return [
+        {
+            "location": f"{rnd.choice(('Lith', 'Meso', 'Neo', 'Axi'))} {rnd.choice('ABCDEFGHKNOPSTV')}{rnd.randint(1, 20)} Relic",
+            "type": "Relic",
+            "rarity": rnd.choice(("Common", "Uncommon", "Rare")),
+            "chance": round(rnd.uniform(0.02, 0.25), 4)
+        }
+        for _ in range(rnd.randint(2, 6))
+    ]
+
+def _component(rnd, unique_name, name, ducats):
+    return {
+        "uniqueName": unique_name,
+        "name": name,
+        "description": _filler(rnd, 12),
+        "ducats": ducats,
+        "primeSellingPrice": ducats,
+        "itemCount": 1,
+        "tradable": True,
+        "masterable": False,
+        "imageName": f"{name.lower()}.png",
+        "drops": _drops(rnd)
+    }
+
+def make_catalog_item(rnd, filename, index, is_prime, parts):
+    kind = os.path.splitext(filename)[0].replace("-", "")
+    stem = f"Synth{kind}{index:05d}"
+    name = f"{stem} Prime" if is_prime else stem
+    code = stem + ("Prime" if is_prime else "")
+    item = {
+        "name": name,
+        "isPrime": is_prime,
+        "description": _filler(rnd, 30),
+        "masteryReq": rnd.randint(0, 16),
+        "tradable": False,
+        "patchlogs": [
+            {"name": f"Update {rnd.randint(10, 38)}", "date": "2024-01-01T00:00:00Z", "changes": _filler(rnd, 40)}
+            for _ in range(rnd.randint(1, 4))
+        ]
+    }
+    if filename == "Warframes.json":
+        item["uniqueName"] = f"/Lotus/Powersuits/{stem}/{code}"
+        components = [_component(rnd, f"/Lotus/Types/Recipes/WarframeRecipes/{code}Blueprint", "Blueprint", rnd.choice(DUCAT_VALUES))]
+        for part in parts:
+            components.append(_component(rnd, f"/Lotus/Types/Recipes/WarframeRecipes/{code}{part}Component",
+                                         part, rnd.choice(DUCAT_VALUES)))
+    else:
+        item["uniqueName"] = f"/Lotus/Weapons/Tenno/{kind}/{code}"
+        components = [_component(rnd, f"/Lotus/Types/Recipes/Weapons/{code}Blueprint", "Blueprint", rnd.choice(DUCAT_VALUES))]
+        for part in parts:
+            components.append(_component(rnd, f"/Lotus/Types/Recipes/Weapons/WeaponParts/{code}{part}",
+                                         part, rnd.choice(DUCAT_VALUES)))
+    components.append({"uniqueName": "/Lotus/Types/Items/MiscItems/OrokinCell", "name": "Orokin Cell",
+                       "type": "Resource", "itemCount": 1, "tradable": True})
+    if is_prime or rnd.random() < 0.3:
+        item["components"] = components if is_prime or not parts else components[1:]
+    return item
+
+def write_catalog(cached_data_dir, scale, rnd):
+    for filename, (total, primes, parts) in CATALOG_SHAPE.items():
+        items = []
+        for index in range(total * scale):
+            items.append(make_catalog_item(rnd, filename, index, index < primes * scale, parts))
+        rnd.shuffle(items)
+        with open(os.path.join(cached_data_dir, filename), 'w', encoding='utf-8') as f:
+            json.dump(items, f)
+
+def write_inventory(path, cached_data_dir, scale, rnd, owned_fraction=0.6):
+    inventory = {key: [] for key in NOISE_SHAPE}
+    for filename in CATALOG_SHAPE:
+        with open(os.path.join(cached_data_dir, filename), 'r', encoding='utf-8') as f:
+            items = json.load(f)
+        for item in items:
+            if not item.get("isPrime"):
+                continue
+            for component in item.get("components", []):
+                unique_name = component["uniqueName"]
+                if component.get("type") == "Resource" or rnd.random() >= owned_fraction:
+                    continue
+                # Warframe parts show up in the inventory as their blueprints
+                if unique_name.endswith("Component"):
+                    unique_name = unique_name[:-len("Component")] + "Blueprint"
+                section = "Recipes" if "/Recipes/" in unique_name else "MiscItems"
+                inventory[section].append({"ItemType": unique_name, "ItemCount": rnd.randint(1, 5)})
+    
+    for index in range(NOISE_SHAPE["MiscItems"] * scale):
+        inventory["MiscItems"].append({"ItemType": f"/Lotus/Types/Items/MiscItems/Synth{index}", "ItemCount": rnd.randint(1, 9999)})
+    for index in range(NOISE_SHAPE["Recipes"] * scale):
+        inventory["Recipes"].append({"ItemType": f"/Lotus/Types/Recipes/Synth/Synth{index}Blueprint", "ItemCount": rnd.randint(0, 3)})
+    for index in range(NOISE_SHAPE["RawUpgrades"] * scale):
+        inventory["RawUpgrades"].append({"ItemType": f"/Lotus/Upgrades/Mods/Synth{index}Mod", "ItemCount": rnd.randint(1, 20),
+                                         "LastAdded": {"$oid": f"{rnd.getrandbits(96):024x}"}})
+    for section in ("LongGuns", "Suits"):
+        for index in range(NOISE_SHAPE[section] * scale):
+            inventory[section].append({
+                "ItemType": f"/Lotus/Weapons/Synth/{section}{index}",
+                "XP": rnd.randint(0, 900000),
+                "Configs": [{"Skins": ["", ""], "Upgrades": [f"{rnd.getrandbits(96):024x}" for _ in range(8)]}
+                            for _ in range(3)],
+                "ItemId": {"$oid": f"{rnd.getrandbits(96):024x}"}
+            })
+    
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(inventory, f)
+
+def make_order_books(item_names, rnd):
+    books = []
+    for _ in item_names:
+        base = rnd.randint(3, 80)
+        orders = []
+        for _ in range(rnd.randint(5, 60)):
+            orders.append({"type": "sell", "visible": rnd.random() > 0.05,
+                           "platinum": max(1, int(base * rnd.uniform(0.8, 1.8)))})
+        # Troll listings the median filter has to throw away
+        for _ in range(rnd.randint(0, 3)):
+            orders.append({"type": "sell", "visible": True, "platinum": rnd.choice((1, 2, base * 20))})
+        for _ in range(rnd.randint(0, 15)):
+            orders.append({"type": "buy", "visible": True, "platinum": max(1, int(base * rnd.uniform(0.4, 0.9)))})
+        books.append(orders)
+    return books
+
+def measure(func, repeat):
+    runs = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        runs.append((time.perf_counter() - start) * 1000.0)
+    timing = {
+        "min_ms": round(min(runs), 3),
+        "median_ms": round(statistics.median(runs), 3),
+        "runs_ms": [round(run, 3) for run in runs]
+    }
+    return timing, result
+
+def bench_scale(data_dir, scale, repeat, seed):
+    rnd = random.Random(seed * 1000 + scale)
+    cached_data_dir = os.path.join(data_dir, f"x{scale}")
+    os.makedirs(cached_data_dir, exist_ok=True)
+    inventory_path = os.path.join(cached_data_dir, "inventory.json")
+    write_catalog(cached_data_dir, scale, rnd)
+    write_inventory(inventory_path, cached_data_dir, scale, rnd)
+    
+    timings = {}
+    category_files = category_file_paths(cached_data_dir)
+    timings["catalog.load"], catalog = measure(lambda: load_catalog(category_files), repeat)
+    
+    def parse_inventory():
+        with open(inventory_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    timings["inventory.parse"], inventory_doc = measure(parse_inventory, repeat)
+    timings["inventory.flatten"], counts = measure(lambda: flatten_inventory(inventory_doc), repeat)
+    del inventory_doc
+    
+    timings["catalog.index"], index = measure(lambda: CatalogIndex(catalog.primes, catalog.item_category_map), repeat)
+    timings["inventory.resolve"], parts = measure(lambda: index.resolve(counts), repeat)
+    
+    item_names = sorted({part["name"] for part in parts})
+    books = make_order_books(item_names, rnd)
+    timings["pricing.summarize"], summaries = measure(lambda: [summarize_orders(book) for book in books], repeat)
+    sell_prices = [summary_sell_prices(summary) for summary in summaries]
+    timings["pricing.reasonable_price"], computed = measure(
+        lambda: [calculate_reasonable_price(prices) for prices in sell_prices], repeat)
+    prices = {name: {"price": price, "timestamp": time.time()} for name, price in zip(item_names, computed)}
+    
+    marks = MarkIndex()
+    marks.set_items(parts)
+    for name in item_names[::10]:
+        marks.toggle_item(name)
+    base_names = sorted({part["base_name"] for part in parts})
+    for base_name in base_names[::25]:
+        marks.toggle_set(base_name)
+    
+    rows = {}
+    for config_name, config in VIEW_CONFIGS.items():
+        def render():
+            filtered = filter_view_items(parts, prices, marks.is_marked, **config)
+            return flat_view_rows(filtered, prices, marks.is_marked, marks.is_set_marked)
+        timings[f"view.{config_name}"], view_rows = measure(render, repeat)
+        rows[config_name] = len(view_rows)
+    timings["view.trade_counter"], _ = measure(lambda: TradeCounter().rebuild(parts, marks.is_marked), repeat)
+    
+    sizes = {
+        "catalog_bytes": sum(os.path.getsize(os.path.join(cached_data_dir, filename)) for filename in CATALOG_SHAPE),
+        "inventory_bytes": os.path.getsize(inventory_path),
+        "primes": len(catalog.primes),
+        "inventory_entries": len(counts),
+        "parts": len(parts),
+        "order_books": len(books),
+        "rows": rows
+    }
+    return {"scale": scale, "sizes": sizes, "timings": timings}
+
+def compare(results, previous, fail_above=None):
+    failed = []
+    old_scales = {str(entry["scale"]): entry for entry in previous.get("scales", [])}
+    print(f"{'scale':>6}  {'benchmark':<26} {'before':>10} {'after':>10} {'change':>8}")
+    for entry in results["scales"]:
+        old = old_scales.get(str(entry["scale"]))
+        if old is None:
+            continue
+        for name, timing in entry["timings"].items():
+            old_timing = old["timings"].get(name)
+            if not old_timing or not old_timing["median_ms"]:
+                continue
+            change = (timing["median_ms"] - old_timing["median_ms"]) / old_timing["median_ms"] * 100.0
+            flag = ""
+            if fail_above is not None and change > fail_above:
+                failed.append((entry["scale"], name))
+                flag = "  !"
+            print(f"{entry['scale']:>5}x  {name:<26} {old_timing['median_ms']:>10.2f} {timing['median_ms']:>10.2f} "
+                  f"{change:>+7.1f}%{flag}")
+    return failed
+
+def run(args):
+    scales = [int(scale) for scale in args.scales.split(",") if scale.strip()]
+    data_dir = args.data_dir or tempfile.mkdtemp(prefix="ducanator_bench_")
+    results = {
+        "version": RESULTS_VERSION,
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": args.repeat,
+        "seed": args.seed,
+        "scales": []
+    }
+    try:
+        for scale in scales:
+            entry = bench_scale(data_dir, scale, args.repeat, args.seed)
+            results["scales"].append(entry)
+            timings = entry["timings"]
+            print(f"{scale:>4}x  {entry['sizes']['parts']:>6} parts  " + "  ".join(
+                f"{name} {timing['median_ms']:.1f}ms" for name, timing in timings.items()))
+    finally:
+        if not args.data_dir:
+            shutil.rmtree(data_dir, ignore_errors=True)
+    
+    out_dir = os.path.dirname(os.path.abspath(args.out))
+    os.makedirs(out_dir, exist_ok=True)
+    write_json_atomic(args.out, results, indent=2)
+    print(f"Results written to {args.out}")
+    
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            previous = json.load(f)
+        failed = compare(results, previous, args.fail_above)
+        if failed:
+            print(f"{len(failed)} benchmark(s) slower than {args.fail_above}%", file=sys.stderr)
+            return 1
+    return 0
+
+def main():
+    parser = argparse.ArgumentParser(description="Time catalog loading, part matching, pricing and view building on synthetic data")
+    parser.add_argument("--scales", default="1,10,100", help="comma separated multiples of a realistic catalog and inventory")
+    parser.add_argument("--repeat", type=int, default=5, help="runs of each benchmark; min and median are reported")
+    parser.add_argument("--out", default=os.path.join("reports", "bench.json"), help="where to write the results")
+    parser.add_argument("--compare", help="earlier results file to print the change against")
+    parser.add_argument("--fail-above", type=float, default=None, help="with --compare, exit 1 if a median got slower by more than this percent")
+    parser.add_argument("--data-dir", default=None, help="keep the generated files here instead of a temporary folder")
+    parser.add_argument("--seed", type=int, default=1)
+    return run(parser.parse_args())
+
+if __name__ == "__main__":
+    sys.exit(main())
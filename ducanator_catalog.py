@@ -0,0 +1,77 @@
+import argparse
+import os
+import sys
+
+from ducanator_core import (
+    SLIM_CATALOG_FILE,
+    build_slim_catalog,
+    category_file_paths,
+    get_base_directory,
+    load_slim_catalog,
+    read_json,
+    write_json_atomic
+)
+
+def cmd_build(args):
+    category_files = category_file_paths(args.cached_data)
+    found = [filename for file_list in category_files.values() for filename in (file_list or ()) if os.path.exists(filename)]
+    if not found:
+        print(f"No category JSON files found in {args.cached_data}", file=sys.stderr)
+        return 1
+    
+    out = args.out or os.path.join(args.cached_data, SLIM_CATALOG_FILE)
+    catalog = build_slim_catalog(category_files)
+    write_json_atomic(out, catalog)
+    
+    raw_size = sum(os.path.getsize(filename) for filename in found)
+    for category, entry in catalog["categories"].items():
+        items = sum(len(slim_file["items"]) for slim_file in entry["files"])
+        missing = [slim_file["name"] for slim_file in entry["files"] if slim_file["source_sha256"] is None]
+        note = f"  (missing: {', '.join(missing)})" if missing else ""
+        print(f"{category:<12} {items:>5} primes  {entry['sha256'][:12]}{note}")
+    print(f"Wrote {out}: {os.path.getsize(out) / 1024:.0f} KB from {raw_size / 1024:.0f} KB in {len(found)} files")
+    return 0
+
+def cmd_check(args):
+    category_files = category_file_paths(args.cached_data)
+    path = args.catalog or os.path.join(args.cached_data, SLIM_CATALOG_FILE)
+    data = read_json(path)
+    if not isinstance(data, dict):
+        print(f"{path} is missing or unreadable; the raw category files are used")
+        return 1
+    
+    usable = load_slim_catalog(path, category_files)
+    outdated = 0
+    for category, file_list in category_files.items():
+        if category == "ALL":
+            continue
+        if usable.get(category):
+            status = "slim"
+        elif category not in usable and any(os.path.exists(filename) for filename in file_list):
+            status = "outdated, raw files used"
+            outdated += 1
+        else:
+            status = "missing"
+        print(f"{category:<12} {status}")
+    return 1 if outdated else 0
+
+def main():
+    parser = argparse.ArgumentParser(description="Build a compact catalog from the category JSON files")
+    parser.add_argument("--cached-data", default=os.path.join(get_base_directory(), "cachedData"),
+                        help="folder holding the category JSON files")
+    commands = parser.add_subparsers(dest="command")
+    commands.required = True
+    
+    build = commands.add_parser("build", help=f"write {SLIM_CATALOG_FILE} with only the prime items and the fields Ducanator reads")
+    build.add_argument("--out", default=None, help=f"where to write it (default: <cached-data>/{SLIM_CATALOG_FILE})")
+    build.set_defaults(func=cmd_build)
+    
+    check = commands.add_parser("check", help="show which categories would be loaded from the slim catalog")
+    check.add_argument("--catalog", default=None, help=f"slim catalog to check (default: <cached-data>/{SLIM_CATALOG_FILE})")
+    check.set_defaults(func=cmd_check)
+    
+    args = parser.parse_args()
+    return args.func(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,2320 @@
+import json
+import os
+import sys
+import time
+import threading
+import tempfile
+import re
+import random
+import bisect
+import functools
+from types import MappingProxyType
+
+def get_base_directory():
+    if getattr(sys, 'frozen', False):
+        return os.path.dirname(sys.executable)
+    else:
+        return os.path.dirname(os.path.abspath(__file__))
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        return False
+
+_NULL_SPAN = _NullSpan()
+
+class _Span:
+    __slots__ = ('metrics', 'name', 'start')
+    
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+    
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.metrics.record_span(self.name, (time.perf_counter() - self.start) * 1000.0)
+        return False
+
+class Metrics:
+    HISTOGRAM_BOUNDS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+    
+    def __init__(self, enabled=False):
+        # Every entry point checks this first, so a disabled instance costs an attribute read
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self.reset()
+    
+    def reset(self):
+        with self._lock:
+            self.spans = {}
+            self.counters = {}
+            self.histograms = {}
+            self.started = time.time()
+    
+    def span(self, name):
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name)
+    
+    def record_span(self, name, ms):
+        with self._lock:
+            stats = self.spans.get(name)
+            if stats is None:
+                stats = self.spans[name] = {"count": 0, "total_ms": 0.0, "max_ms": 0.0, "last_ms": 0.0}
+            stats["count"] += 1
+            stats["total_ms"] += ms
+            stats["max_ms"] = max(stats["max_ms"], ms)
+            stats["last_ms"] = ms
+    
+    def count(self, name, amount=1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+    
+    def observe(self, name, ms):
+        if not self.enabled:
+            return
+        index = bisect.bisect_left(self.HISTOGRAM_BOUNDS, ms)
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = {
+                    "count": 0,
+                    "total_ms": 0.0,
+                    "max_ms": 0.0,
+                    "buckets": [0] * (len(self.HISTOGRAM_BOUNDS) + 1)
+                }
+            histogram["count"] += 1
+            histogram["total_ms"] += ms
+            histogram["max_ms"] = max(histogram["max_ms"], ms)
+            histogram["buckets"][index] += 1
+    
+    def percentile(self, histogram, fraction):
+        # Upper bound of the bucket holding the given fraction of observations
+        target = histogram["count"] * fraction
+        seen = 0
+        for bound, bucket in zip(self.HISTOGRAM_BOUNDS, histogram["buckets"]):
+            seen += bucket
+            if seen >= target:
+                return bound
+        return None
+    
+    def to_json(self):
+        with self._lock:
+            return {
+                "started": self.started,
+                "elapsed": time.time() - self.started,
+                "spans": {name: dict(stats) for name, stats in self.spans.items()},
+                "counters": dict(self.counters),
+                "histograms": {
+                    name: dict(histogram, buckets=list(histogram["buckets"]), bounds_ms=list(self.HISTOGRAM_BOUNDS))
+                    for name, histogram in self.histograms.items()
+                }
+            }
+    
+    def report(self):
+        data = self.to_json()
+        lines = [f"{'Span':<28}{'count':>7}{'avg ms':>10}{'max ms':>10}{'last ms':>10}"]
+        for name, stats in sorted(data["spans"].items()):
+            lines.append(
+                f"{name:<28}{stats['count']:>7}{stats['total_ms'] / stats['count']:>10.1f}"
+                f"{stats['max_ms']:>10.1f}{stats['last_ms']:>10.1f}"
+            )
+        lines.append("")
+        lines.append(f"{'Counter':<28}{'count':>7}")
+        for name, value in sorted(data["counters"].items()):
+            lines.append(f"{name:<28}{value:>7}")
+        lines.append("")
+        lines.append(f"{'Histogram':<28}{'count':>7}{'avg ms':>10}{'p50 <=':>10}{'p95 <=':>10}{'max ms':>10}")
+        for name, histogram in sorted(data["histograms"].items()):
+            p50 = self.percentile(histogram, 0.5)
+            p95 = self.percentile(histogram, 0.95)
+            lines.append(
+                f"{name:<28}{histogram['count']:>7}{histogram['total_ms'] / histogram['count']:>10.1f}"
+                f"{p50 if p50 is not None else '-':>10}{p95 if p95 is not None else '-':>10}{histogram['max_ms']:>10.1f}"
+            )
+        return "\n".join(lines)
+
+metrics = Metrics()
+
+def timed(name):
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not metrics.enabled:
+                return fn(*args, **kwargs)
+            with metrics.span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+class MemoryReport:
+    def __init__(self, frames=40):
+        # Deep tracebacks so allocations made inside json or the stdlib still reach the function that asked for them
+        self.frames = frames
+        self.subsystems = []
+        self._ranges = None
+    
+    def register(self, name, *objects):
+        self.subsystems.append((name, objects))
+        self._ranges = None
+    
+    @property
+    def tracing(self):
+        # tracemalloc and dis are only needed once someone asks for a report, so they stay out of the import
+        import tracemalloc
+        return tracemalloc.is_tracing()
+    
+    def start(self):
+        import tracemalloc
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+    
+    def stop(self):
+        import tracemalloc
+        tracemalloc.stop()
+    
+    @classmethod
+    def _code_objects(cls, obj):
+        if isinstance(obj, type):
+            codes = []
+            for value in vars(obj).values():
+                codes.extend(cls._code_objects(value))
+            return codes
+        if isinstance(obj, (staticmethod, classmethod)):
+            obj = obj.__func__
+        elif isinstance(obj, property):
+            return [code for fn in (obj.fget, obj.fset) if fn is not None for code in cls._code_objects(fn)]
+        while hasattr(obj, "__wrapped__"):
+            obj = obj.__wrapped__
+        code = getattr(obj, "__code__", None)
+        return [code] if code is not None else []
+    
+    @staticmethod
+    def _last_line(code):
+        import dis
+        last = code.co_firstlineno
+        for _, line in dis.findlinestarts(code):
+            if line is not None and line > last:
+                last = line
+        for const in code.co_consts:
+            if hasattr(const, "co_firstlineno"):
+                last = max(last, MemoryReport._last_line(const))
+        return last
+    
+    def _line_ranges(self):
+        if self._ranges is None:
+            ranges = {}
+            for name, objects in self.subsystems:
+                for obj in objects:
+                    for code in self._code_objects(obj):
+                        ranges.setdefault(code.co_filename, []).append(
+                            (code.co_firstlineno, self._last_line(code), name)
+                        )
+            self._ranges = ranges
+        return self._ranges
+    
+    def _owner(self, ranges, filename, lineno):
+        for first, last, name in ranges.get(filename, ()):
+            if first <= lineno <= last:
+                return name
+        return None
+    
+    def take(self):
+        import tracemalloc
+        if not tracemalloc.is_tracing():
+            return None
+        ranges = self._line_ranges()
+        snapshot = tracemalloc.take_snapshot()
+        owners = {}
+        subsystems = {}
+        # Each live block belongs to the innermost registered function on its traceback
+        for stat in snapshot.statistics("traceback"):
+            owner = "other"
+            for frame in reversed(stat.traceback):
+                key = (frame.filename, frame.lineno)
+                if key not in owners:
+                    owners[key] = self._owner(ranges, frame.filename, frame.lineno)
+                if owners[key] is not None:
+                    owner = owners[key]
+                    break
+            totals = subsystems.setdefault(owner, {"bytes": 0, "blocks": 0})
+            totals["bytes"] += stat.size
+            totals["blocks"] += stat.count
+        current, peak = tracemalloc.get_traced_memory()
+        return {
+            "taken": time.time(),
+            "current_bytes": current,
+            "peak_bytes": peak,
+            "subsystems": subsystems
+        }
+    
+    @staticmethod
+    def report(data):
+        if data is None:
+            return "Memory tracing is off"
+        lines = [
+            f"{'Memory':<28}{'MB':>10}{'blocks':>10}",
+            f"{'traced now':<28}{data['current_bytes'] / 1048576:>10.2f}",
+            f"{'traced peak':<28}{data['peak_bytes'] / 1048576:>10.2f}"
+        ]
+        for name, totals in sorted(data["subsystems"].items(), key=lambda item: -item[1]["bytes"]):
+            lines.append(f"{name:<28}{totals['bytes'] / 1048576:>10.2f}{totals['blocks']:>10}")
+        return "\n".join(lines)
+
+memory = MemoryReport()
+
+def write_json_atomic(path, data, indent=None):
+    directory = os.path.dirname(path) or "."
+    fd, tmp_path = tempfile.mkstemp(prefix=".tmp-", suffix=".json", dir=directory)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=indent)
+            f.flush()
+            os.fsync(f.fileno())
+        
+        # Windows refuses to replace a file another process (e.g. a virus scanner) has open
+        for attempt in range(5):
+            try:
+                os.replace(tmp_path, path)
+                break
+            except PermissionError:
+                if attempt == 4:
+                    raise
+                time.sleep(0.05)
+    except:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+def read_json(path, default=None):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except:
+        return default
+
+def _lock_fd(fd):
+    if os.name == 'nt':
+        import msvcrt
+        os.lseek(fd, 0, os.SEEK_SET)
+        # msvcrt only offers a lock that gives up after ~10s, so poll the non-blocking one
+        while True:
+            try:
+                msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+                return
+            except OSError:
+                time.sleep(0.01)
+    else:
+        import fcntl
+        fcntl.flock(fd, fcntl.LOCK_EX)
+
+def _unlock_fd(fd):
+    if os.name == 'nt':
+        import msvcrt
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+    else:
+        import fcntl
+        fcntl.flock(fd, fcntl.LOCK_UN)
+
+class FileLock:
+    def __init__(self, path):
+        self.path = path
+        self._fd = None
+        self._thread_lock = threading.Lock()
+    
+    def __enter__(self):
+        # OS locks are held per process, so threads of this process queue up here first
+        self._thread_lock.acquire()
+        try:
+            if self._fd is None:
+                self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            _lock_fd(self._fd)
+        except:
+            self._thread_lock.release()
+            raise
+        return self
+    
+    def __exit__(self, *exc_info):
+        try:
+            _unlock_fd(self._fd)
+        finally:
+            self._thread_lock.release()
+    
+    def close(self):
+        with self._thread_lock:
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+
+class WriteBehindFile:
+    def __init__(self, path, delay=0.5, indent=None, merge=None):
+        self.path = path
+        self.delay = delay
+        self.indent = indent
+        # With a merge function the file is shared with other processes: each write
+        # folds our payload into whatever is on disk while holding a lock file
+        self.merge = merge
+        self._file_lock = FileLock(path + ".lock") if merge is not None else None
+        self._payload = None
+        self._dirty = False
+        self._closed = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(
+            target=self._run,
+            name=f"write-behind:{os.path.basename(path)}",
+            daemon=True
+        )
+        self._thread.start()
+    
+    def schedule(self, payload):
+        with self._cond:
+            self._payload = payload
+            self._dirty = True
+            self._cond.notify()
+    
+    def close(self, timeout=5.0):
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join(timeout)
+        if self._file_lock is not None:
+            self._file_lock.close()
+    
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._dirty and not self._closed:
+                    self._cond.wait()
+                
+                # Let further changes pile up before touching the disk
+                deadline = time.monotonic() + self.delay
+                while not self._closed:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                
+                if not self._dirty:
+                    return
+                payload = self._payload
+                self._payload = None
+                self._dirty = False
+            
+            try:
+                if self.merge is None:
+                    write_json_atomic(self.path, payload, indent=self.indent)
+                else:
+                    with self._file_lock:
+                        payload = self.merge(read_json(self.path), payload)
+                        write_json_atomic(self.path, payload, indent=self.indent)
+            except Exception as e:
+                print(f"Error saving {self.path}: {e}")
+
+class SweepCheckpoint:
+    def __init__(self, path):
+        self.path = path
+        self.started = None
+        self.targets = []
+        self.completed = set()
+        self._lock = threading.Lock()
+        self._writer = WriteBehindFile(path, delay=1.0)
+    
+    @property
+    def active(self):
+        return self.started is not None
+    
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('started') is not None:
+                self.started = data['started']
+                self.targets = list(data.get('targets', []))
+                self.completed = set(data.get('completed', []))
+        except Exception as e:
+            print(f"Error loading {self.path}: {e}")
+    
+    def _save(self):
+        self._writer.schedule({
+            'started': self.started,
+            'targets': self.targets,
+            'completed': sorted(self.completed)
+        })
+    
+    def start(self, targets, started):
+        with self._lock:
+            self.started = started
+            self.targets = list(dict.fromkeys(targets))
+            self.completed = set()
+            self._save()
+    
+    def pending(self):
+        with self._lock:
+            return [name for name in self.targets if name not in self.completed]
+    
+    def is_refreshed(self, entry):
+        # Anything fetched after the sweep began counts, whichever path fetched it
+        return isinstance(entry, dict) and self.started is not None and entry.get('timestamp', 0) >= self.started
+    
+    def complete(self, item_name):
+        with self._lock:
+            if self.started is None or item_name in self.completed:
+                return
+            self.completed.add(item_name)
+            self._save()
+    
+    def finish(self):
+        with self._lock:
+            self.started = None
+            self.targets = []
+            self.completed = set()
+            self._writer.schedule({})
+    
+    def close(self):
+        self._writer.close()
+
+class ResponseMetaCache:
+    def __init__(self, path=None):
+        self.path = path
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._writer = None
+        if path is None:
+            return
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    self._entries = json.load(f)
+            except Exception as e:
+                print(f"Error loading {path}: {e}")
+        self._writer = WriteBehindFile(path, delay=2.0, merge=self._merge)
+    
+    def _merge(self, on_disk, entries):
+        merged = dict(on_disk) if isinstance(on_disk, dict) else {}
+        merged.update(entries)
+        return merged
+    
+    def get(self, url):
+        with self._lock:
+            return self._entries.get(url)
+    
+    def put(self, url, etag, last_modified, summary):
+        with self._lock:
+            if etag or last_modified:
+                self._entries[url] = {
+                    'etag': etag,
+                    'last_modified': last_modified,
+                    'summary': summary
+                }
+            elif self._entries.pop(url, None) is None:
+                return
+            if self._writer is not None:
+                self._writer.schedule(dict(self._entries))
+    
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+DEFAULT_SETTINGS = {
+    "price_ttl_floor": 900,
+    "price_ttl_ceiling": 86400,
+    "market_api_url": "https://api.warframe.market/v2",
+    "market_rate": 3.0,
+    "metrics": False,
+    "memory_report": False,
+    "low_memory": False,
+}
+
+def load_settings(path):
+    settings = dict(DEFAULT_SETTINGS)
+    if os.path.exists(path):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if isinstance(data, dict):
+                settings.update(data)
+        except Exception as e:
+            print(f"Error loading {path}: {e}")
+    return settings
+
+def entry_price(entry):
+    if isinstance(entry, dict):
+        return entry.get('price')
+    if isinstance(entry, (int, float)):
+        return entry
+    return None
+
+class PriceTable:
+    def __init__(self, entries=None):
+        self._write_lock = threading.Lock()
+        self._entries = dict(entries or {})
+        self.version = 0
+    
+    def snapshot(self):
+        return MappingProxyType(self._entries)
+    
+    def get(self, item_name):
+        return self._entries.get(item_name)
+    
+    def price_of(self, item_name):
+        return entry_price(self._entries.get(item_name))
+    
+    def replace(self, entries):
+        with self._write_lock:
+            self._entries = dict(entries)
+            self.version += 1
+    
+    def update_many(self, updates):
+        if not updates:
+            return
+        # Published dicts are never mutated, so readers can use them without locking
+        with self._write_lock:
+            entries = dict(self._entries)
+            entries.update(updates)
+            self._entries = entries
+            self.version += 1
+    
+    def update(self, item_name, entry):
+        self.update_many({item_name: entry})
+    
+    def to_json(self):
+        return self._entries
+
+def entry_timestamp(entry):
+    if isinstance(entry, dict):
+        return entry.get('timestamp') or 0
+    return 0
+
+def merge_price_entries(base, updates):
+    # Per item, whichever side fetched most recently wins
+    merged = dict(base) if isinstance(base, dict) else {}
+    for item_name, entry in updates.items():
+        if entry_timestamp(entry) >= entry_timestamp(merged.get(item_name)):
+            merged[item_name] = entry
+    return merged
+
+def calculate_reasonable_price(prices):
+    if not prices:
+        return None
+    
+    sorted_prices = sorted(prices)
+    filtered_prices = sorted_prices.copy()
+    
+    changed = True
+    while changed and len(filtered_prices) > 1:
+        changed = False
+        for i in range(len(filtered_prices) - 1):
+            if filtered_prices[i] < (filtered_prices[i + 1] / 2.0):
+                filtered_prices.pop(i)
+                changed = True
+                break
+    
+    if len(filtered_prices) < max(1, len(sorted_prices) * 0.25):
+        filtered_prices = sorted_prices
+    
+    n = len(filtered_prices)
+    if n == 0:
+        return None
+    
+    if n % 2 == 0:
+        median = (filtered_prices[n // 2 - 1] + filtered_prices[n // 2]) / 2.0
+    else:
+        median = filtered_prices[n // 2]
+    
+    best_price = None
+    min_distance = float('inf')
+    for price in filtered_prices:
+        distance = abs(price - median)
+        if distance < min_distance or (distance == min_distance and price < best_price):
+            min_distance = distance
+            best_price = price
+    
+    return int(best_price) if best_price is not None else int(filtered_prices[0])
+
+def summarize_orders(orders):
+    sell_prices = []
+    buy_prices = []
+    for order in orders:
+        if not order.get('visible', True):
+            continue
+        platinum = order.get('platinum', 0)
+        if platinum <= 0:
+            continue
+        if order.get('type') == 'sell':
+            sell_prices.append(platinum)
+        elif order.get('type') == 'buy':
+            buy_prices.append(platinum)
+    
+    sell_prices.sort()
+    levels = []
+    for platinum in sell_prices:
+        if levels and levels[-1][0] == platinum:
+            levels[-1][1] += 1
+        else:
+            levels.append([platinum, 1])
+    
+    n = len(sell_prices)
+    quantiles = []
+    if sell_prices:
+        quantiles = [sell_prices[int(q * (n - 1))] for q in (0.0, 0.25, 0.5, 0.75, 1.0)]
+    
+    return {
+        'sell_count': n,
+        'buy_count': len(buy_prices),
+        'best_sell': sell_prices[0] if sell_prices else None,
+        'best_buy': max(buy_prices) if buy_prices else None,
+        'quantiles': quantiles,
+        'levels': levels
+    }
+
+def summary_sell_prices(summary):
+    prices = []
+    for platinum, count in summary.get('levels', ()):
+        prices.extend([platinum] * count)
+    return prices
+
+def price_from_summary(summary):
+    if not summary:
+        return None
+    return calculate_reasonable_price(summary_sell_prices(summary))
+
+class PriceTTLPolicy:
+    HISTORY_LENGTH = 6
+    
+    def __init__(self, floor=900, ceiling=86400, default=3600, sensitivity=50.0):
+        self.floor = floor
+        self.ceiling = max(floor, ceiling)
+        self.default = min(self.ceiling, max(floor, default))
+        self.sensitivity = sensitivity
+    
+    @staticmethod
+    def history_of(entry):
+        if not isinstance(entry, dict):
+            return []
+        return [p for p in entry.get('history', ()) if p is not None]
+    
+    def volatility(self, history):
+        changes = [abs(b - a) / max(a, 1) for a, b in zip(history, history[1:])]
+        if not changes:
+            return None
+        return sum(changes) / len(changes)
+    
+    def ttl(self, entry):
+        history = self.history_of(entry)
+        volatility = self.volatility(history)
+        if volatility is None:
+            return self.default
+        target = self.ceiling / (1.0 + volatility * self.sensitivity)
+        # A couple of matching fetches only nudge the expiry away from the default
+        confidence = min(1.0, (len(history) - 1) / (self.HISTORY_LENGTH - 1))
+        ttl = self.default + (target - self.default) * confidence
+        return min(self.ceiling, max(self.floor, ttl))
+    
+    def is_fresh(self, entry, now):
+        if not isinstance(entry, dict) or 'price' not in entry:
+            return False
+        return now - entry.get('timestamp', 0) < self.ttl(entry)
+    
+    def urgency(self, entry, now):
+        if not isinstance(entry, dict) or 'price' not in entry:
+            return float('inf')
+        return (now - entry.get('timestamp', 0)) / self.ttl(entry)
+    
+    def record(self, entry, price, now, summary=None):
+        history = self.history_of(entry)
+        if price is not None:
+            history = (history + [price])[-self.HISTORY_LENGTH:]
+        recorded = {
+            'price': price,
+            'timestamp': now,
+            'history': history
+        }
+        if summary is not None:
+            recorded['summary'] = summary
+        return recorded
+
+class TransientFetchError(Exception):
+    def __init__(self, message, retry_after=None, throttled=False):
+        super().__init__(message)
+        self.retry_after = retry_after
+        self.throttled = throttled
+
+def parse_retry_after(value):
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    from email.utils import parsedate_to_datetime
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+def pause(job, seconds):
+    if seconds <= 0:
+        return job is not None and job.cancelled
+    if job is not None:
+        return job.wait(seconds)
+    time.sleep(seconds)
+    return False
+
+class SharedRateBudget:
+    # Request slots and in-flight item claims shared by every process using the same state file.
+    # Wall clock time is used because monotonic clocks aren't comparable between processes.
+    MAX_AHEAD = 3600.0
+    
+    def __init__(self, path):
+        self.path = path
+        self.owner = f"{os.getpid()}:{id(self)}"
+        self._lock = FileLock(path + ".lock")
+    
+    def _read(self, now):
+        state = read_json(self.path, {})
+        if not isinstance(state, dict):
+            state = {}
+        next_slot = float(state.get('next_slot') or 0.0)
+        blocked_until = float(state.get('blocked_until') or 0.0)
+        # Anything this far ahead was left behind by a clock change, not by another instance
+        if next_slot > now + self.MAX_AHEAD:
+            next_slot = now
+        if blocked_until > now + self.MAX_AHEAD:
+            blocked_until = now
+        claims = {
+            key: claim for key, claim in (state.get('claims') or {}).items()
+            if isinstance(claim, list) and len(claim) == 2 and now < claim[1] < now + self.MAX_AHEAD
+        }
+        return {"next_slot": next_slot, "blocked_until": blocked_until, "claims": claims}
+    
+    def _write(self, state):
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+    
+    def reserve(self, interval):
+        with self._lock:
+            now = time.time()
+            state = self._read(now)
+            slot = max(now, state['next_slot'], state['blocked_until'])
+            state['next_slot'] = slot + interval
+            self._write(state)
+        return slot - now
+    
+    def block(self, seconds):
+        with self._lock:
+            now = time.time()
+            state = self._read(now)
+            state['blocked_until'] = max(state['blocked_until'], now + seconds)
+            self._write(state)
+    
+    def blocked_for(self):
+        with self._lock:
+            now = time.time()
+            return self._read(now)['blocked_until'] - now
+    
+    def claim(self, key, ttl):
+        # False while another instance holds an unexpired claim on key
+        with self._lock:
+            now = time.time()
+            state = self._read(now)
+            claim = state['claims'].get(key)
+            if claim is not None and claim[0] != self.owner:
+                return False
+            state['claims'][key] = [self.owner, now + ttl]
+            self._write(state)
+            return True
+    
+    def release(self, key, linger=0.0):
+        # With linger the claim is kept just long enough for a deferred save to reach the disk
+        with self._lock:
+            now = time.time()
+            state = self._read(now)
+            claim = state['claims'].get(key)
+            if claim is None or claim[0] != self.owner:
+                return
+            if linger > 0:
+                claim[1] = min(claim[1], now + linger)
+            else:
+                del state['claims'][key]
+            self._write(state)
+    
+    def is_claimed(self, key):
+        with self._lock:
+            claim = self._read(time.time())['claims'].get(key)
+        return claim is not None and claim[0] != self.owner
+    
+    def close(self):
+        self._lock.close()
+
+class AdaptiveRateLimiter:
+    def __init__(self, rate=3.0, min_rate=0.5, recovery_factor=1.1, budget=None):
+        self.max_rate = rate
+        self.min_rate = min_rate
+        self.recovery_factor = recovery_factor
+        self.rate = rate
+        self.budget = budget
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+        self._blocked_until = 0.0
+    
+    def _reserve(self):
+        if self.budget is not None:
+            return self.budget.reserve(1.0 / self.rate)
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot, self._blocked_until)
+            self._next_slot = slot + 1.0 / self.rate
+        return slot - now
+    
+    def _is_blocked(self):
+        if self.budget is not None:
+            return self.budget.blocked_for() > 0
+        return time.monotonic() < self._blocked_until
+    
+    def acquire(self, job=None):
+        while True:
+            if pause(job, self._reserve()):
+                return False
+            # A throttle that arrived while we slept invalidates the slot we were given
+            if not self._is_blocked():
+                return True
+    
+    def throttle(self, retry_after=None):
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate / 2.0)
+            if retry_after:
+                self._blocked_until = max(self._blocked_until, time.monotonic() + retry_after)
+        if retry_after and self.budget is not None:
+            self.budget.block(retry_after)
+    
+    def recover(self):
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate * self.recovery_factor)
+
+class _FlightCall:
+    def __init__(self, job=None):
+        self.job = job
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.cancelled = False
+
+class SingleFlight:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+    
+    def do(self, key, fn, job=None):
+        while True:
+            with self._lock:
+                call = self._calls.get(key)
+                is_leader = call is None
+                if is_leader:
+                    call = _FlightCall(job)
+                    self._calls[key] = call
+            
+            if is_leader:
+                break
+            call.done.wait()
+            if call.error is None:
+                return call.result
+            if call.cancelled and call.job is not job:
+                # The leader stopped because its own job was cancelled; that says nothing about ours
+                continue
+            raise call.error
+        
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            call.cancelled = job is not None and job.cancelled
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+def item_name_to_slug(item_name):
+    slug = item_name.lower().strip()
+    slug = slug.replace('&', 'and')
+    slug = re.sub(r'\s+', '_', slug)
+    slug = re.sub(r'[^a-z0-9_]', '', slug)
+    
+    if 'kompressa' in slug and 'receiver' in slug:
+        slug = slug.replace('receiver', 'reciever')
+    
+    return slug
+
+def get_warframe_slug_variations(item_name):
+    component_types = ['neuroptics', 'chassis', 'systems']
+    item_lower = item_name.lower()
+    base_slug = item_name_to_slug(item_name)
+    variations = [base_slug]
+    
+    if 'prime' in item_lower:
+        for component in component_types:
+            if component in item_lower:
+                slug_parts = base_slug.split('_')
+                if 'prime' in slug_parts:
+                    prime_idx = slug_parts.index('prime')
+                    if prime_idx > 0:
+                        warframe_name = slug_parts[prime_idx - 1]
+                        variation_with_blueprint = f"{warframe_name}_prime_{component}_blueprint"
+                        if variation_with_blueprint not in variations:
+                            variations.append(variation_with_blueprint)
+                break
+    
+    return variations
+
+def summary_from_payload(data):
+    if data.get('error'):
+        return None
+    
+    orders = data.get('data', [])
+    if isinstance(orders, dict):
+        orders = orders.get('payload', {}).get('orders', [])
+    
+    if not isinstance(orders, list) or not orders:
+        return None
+    
+    summary = summarize_orders(orders)
+    if not summary['sell_count']:
+        return None
+    
+    return summary
+
+class MarketPriceSource:
+    DEFAULT_BASE_URL = "https://api.warframe.market/v2"
+    
+    def __init__(self, base_url=None, http_cache=None, timeout=5):
+        self.base_url = (base_url or self.DEFAULT_BASE_URL).rstrip('/')
+        self.http_cache = http_cache if http_cache is not None else ResponseMetaCache()
+        self.timeout = timeout
+    
+    def orders_url(self, slug):
+        return f"{self.base_url}/orders/item/{slug}"
+    
+    def fetch_summary(self, slug):
+        # urllib.request drags in http.client and ssl, so only pay for it once we go online
+        import urllib.request
+        import urllib.error
+        
+        api_url = self.orders_url(slug)
+        headers = {
+            'User-Agent': 'Ducanator/1.0',
+            'Accept': 'application/json'
+        }
+        cached = self.http_cache.get(api_url)
+        if cached:
+            if cached.get('etag'):
+                headers['If-None-Match'] = cached['etag']
+            if cached.get('last_modified'):
+                headers['If-Modified-Since'] = cached['last_modified']
+        
+        try:
+            req = urllib.request.Request(api_url, headers=headers)
+            
+            with urllib.request.urlopen(req, timeout=self.timeout) as response:
+                data = json.loads(response.read().decode('utf-8'))
+                metrics.count("http.200")
+                summary = summary_from_payload(data)
+                self.http_cache.put(
+                    api_url,
+                    response.headers.get('ETag'),
+                    response.headers.get('Last-Modified'),
+                    summary
+                )
+                return summary
+                
+        except urllib.error.HTTPError as e:
+            metrics.count(f"http.{e.code}")
+            if e.code == 304 and cached:
+                # Nothing changed since the stored response, so its summary still holds
+                return cached.get('summary')
+            retry_after = e.headers.get('Retry-After') if e.headers else None
+            # A bare 503 is usually a hiccup; only slow down when the server asks us to
+            if e.code == 429 or (e.code == 503 and retry_after):
+                raise TransientFetchError(f"HTTP {e.code} for {slug}", parse_retry_after(retry_after), throttled=True)
+            if e.code >= 500:
+                raise TransientFetchError(f"HTTP {e.code} for {slug}")
+            return None
+        except OSError as e:
+            # URLError, timeouts and dropped connections are all worth another try
+            raise TransientFetchError(f"{slug}: {e}")
+        except Exception as e:
+            return None
+
+class PriceFetcher:
+    WORKERS = 3
+    ATTEMPTS = 4
+    BACKOFF_BASE = 0.5
+    BACKOFF_CAP = 8.0
+    CLAIM_TTL = 30.0
+    
+    def __init__(self, source, prices=None, price_ttl=None, rate=3.0, slug_result_ttl=0.0, on_record=None,
+                 rate_budget=None, before_fetch=None, claim_handoff=0.0):
+        self.source = source
+        self.prices = prices if prices is not None else PriceTable()
+        self.price_ttl = price_ttl if price_ttl is not None else PriceTTLPolicy()
+        self.rate_budget = rate_budget
+        self.rate_limiter = AdaptiveRateLimiter(rate=rate, budget=rate_budget)
+        self.slug_flights = SingleFlight()
+        # When set, a slug's finished result is reused for this many seconds, so item names
+        # that share a listing cost one request even when they aren't fetched at the same time
+        self.slug_result_ttl = slug_result_ttl
+        self._slug_results = {}
+        self._slug_results_lock = threading.Lock()
+        self.on_record = on_record
+        self.before_fetch = before_fetch
+        self.claim_handoff = claim_handoff
+    
+    def _request_summary(self, slug, job=None):
+        for attempt in range(self.ATTEMPTS):
+            waited = time.perf_counter()
+            if not self.rate_limiter.acquire(job):
+                raise TransientFetchError(f"Cancelled fetching {slug}")
+            started = time.perf_counter()
+            metrics.observe("price.rate_wait_ms", (started - waited) * 1000.0)
+            try:
+                summary = self.source.fetch_summary(slug)
+            except TransientFetchError as e:
+                metrics.observe("price.request_ms", (time.perf_counter() - started) * 1000.0)
+                metrics.count("price.throttled" if e.throttled else "price.transient_error")
+                if e.throttled:
+                    self.rate_limiter.throttle(e.retry_after)
+                if attempt + 1 >= self.ATTEMPTS:
+                    raise
+                if e.retry_after is not None:
+                    delay = e.retry_after
+                else:
+                    delay = random.uniform(0, min(self.BACKOFF_CAP, self.BACKOFF_BASE * 2 ** attempt))
+                if pause(job, delay):
+                    raise
+                continue
+            metrics.observe("price.request_ms", (time.perf_counter() - started) * 1000.0)
+            self.rate_limiter.recover()
+            return summary
+    
+    def fetch_summary(self, slug, job=None, force_refresh=False):
+        if self.slug_result_ttl and not force_refresh:
+            with self._slug_results_lock:
+                reused = self._slug_results.get(slug)
+            if reused is not None and time.monotonic() - reused[0] < self.slug_result_ttl:
+                return reused[1]
+        # Concurrent callers for one slug share a single request
+        summary = self.slug_flights.do(slug, lambda: self._request_summary(slug, job), job)
+        if self.slug_result_ttl:
+            with self._slug_results_lock:
+                self._slug_results[slug] = (time.monotonic(), summary)
+        return summary
+    
+    def _wait_for_other_instance(self, item_name, job=None):
+        # Another instance requesting this item saves its price shortly, so wait for that
+        # instead of spending a second request on it
+        waited = False
+        while not self.rate_budget.claim(item_name, self.CLAIM_TTL):
+            waited = True
+            if pause(job, 0.5):
+                return None
+            if self.before_fetch is not None:
+                self.before_fetch()
+            cached = self.prices.get(item_name)
+            if self.price_ttl.is_fresh(cached, time.time()):
+                return cached
+        if waited and self.before_fetch is not None:
+            # The claim was released, which usually means the result was just saved
+            self.before_fetch()
+            cached = self.prices.get(item_name)
+            if self.price_ttl.is_fresh(cached, time.time()):
+                return cached
+        return None
+    
+    def fetch(self, item_name, force_refresh=False, job=None):
+        if not force_refresh and self.before_fetch is not None:
+            self.before_fetch()
+        cached = self.prices.get(item_name)
+        if not force_refresh and self.price_ttl.is_fresh(cached, time.time()):
+            metrics.count("price.cache_hit")
+            return cached['price']
+        if force_refresh:
+            metrics.count("price.forced")
+        else:
+            metrics.count("price.stale_hit" if cached is not None else "price.cache_miss")
+        
+        claimed = not force_refresh and self.rate_budget is not None
+        if claimed:
+            shared = self._wait_for_other_instance(item_name, job)
+            if shared is not None:
+                metrics.count("price.shared_hit")
+                self.rate_budget.release(item_name)
+                return shared['price']
+        
+        linger = 0.0
+        try:
+            price = self._fetch_and_record(item_name, cached, job, force_refresh)
+            if self.prices.get(item_name) is not cached:
+                # A result (found or not) was recorded; waiters pick it up once it's saved
+                linger = self.claim_handoff
+            return price
+        finally:
+            # A failed fetch hands the item to waiting instances straight away
+            if claimed:
+                self.rate_budget.release(item_name, linger)
+    
+    def _fetch_and_record(self, item_name, cached, job=None, force_refresh=False):
+        slug = item_name_to_slug(item_name)
+        if not slug:
+            return None
+        
+        try:
+            summary = self.fetch_summary(slug, job, force_refresh)
+            if summary is None:
+                for variation in get_warframe_slug_variations(item_name)[1:]:
+                    summary = self.fetch_summary(variation, job, force_refresh)
+                    if summary is not None:
+                        break
+                    metrics.count("price.slug_variation_miss")
+        except TransientFetchError as e:
+            # Keep whatever we had; a throttled or failed request says nothing about the price
+            if job is None or not job.cancelled:
+                print(f"Error fetching price for {item_name}: {e}")
+            return self.prices.price_of(item_name)
+        
+        price = price_from_summary(summary)
+        if price is None:
+            metrics.count("price.not_found")
+        entry = self.price_ttl.record(cached, price, time.time(), summary)
+        self.prices.update(item_name, entry)
+        if self.on_record is not None:
+            self.on_record(item_name, entry)
+        return price
+    
+    def fetch_many(self, item_names, forced=(), force_refresh=False, job=None, on_result=None):
+        from concurrent.futures import ThreadPoolExecutor, as_completed
+        
+        fetched_count = 0
+        # Pacing lives in the shared rate limiter, so a few workers just keep it saturated
+        # while individual requests are in flight
+        executor = ThreadPoolExecutor(max_workers=self.WORKERS, thread_name_prefix="ducanator-fetch")
+        futures = {}
+        try:
+            futures = {
+                executor.submit(self.fetch, item_name, force_refresh or item_name in forced, job): item_name
+                for item_name in item_names
+            }
+            for future in as_completed(futures):
+                if job is not None and job.cancelled:
+                    break
+                
+                item_name = futures[future]
+                try:
+                    price = future.result()
+                except Exception as e:
+                    print(f"Error fetching price for {item_name}: {e}")
+                    continue
+                if price is not None:
+                    fetched_count += 1
+                if on_result is not None:
+                    on_result(item_name, price)
+        finally:
+            for future in futures:
+                future.cancel()
+            executor.shutdown(wait=False)
+        return fetched_count
+
+class MarkIndex:
+    LEGACY_SET_PREFIX = "BASE:"
+    
+    def __init__(self):
+        self.marked_sets = set()
+        self.marked_components = set()
+        self.set_of = {}
+        self.components_of = {}
+    
+    @staticmethod
+    def membership(items):
+        # Built off the UI thread and applied with set_membership, so readers never see half of it
+        set_of = {}
+        components_of = {}
+        for item in items:
+            item_name = item.get("name")
+            base_name = item.get("base_name")
+            if not item_name or not base_name:
+                continue
+            set_of[item_name] = base_name
+            components_of.setdefault(base_name, set()).add(item_name)
+        return set_of, components_of
+    
+    def set_membership(self, membership):
+        self.set_of, self.components_of = membership
+    
+    def set_items(self, items):
+        self.set_membership(self.membership(items))
+    
+    def is_marked(self, item_name, base_name=None):
+        if item_name in self.marked_components:
+            return True
+        if base_name is None:
+            base_name = self.set_of.get(item_name)
+        return base_name in self.marked_sets
+    
+    def is_set_marked(self, base_name):
+        return base_name in self.marked_sets
+    
+    def toggle_item(self, item_name):
+        if item_name in self.marked_components:
+            self.marked_components.remove(item_name)
+        else:
+            self.marked_components.add(item_name)
+        return self.is_marked(item_name)
+    
+    def toggle_set(self, base_name):
+        if base_name in self.marked_sets:
+            self.marked_sets.remove(base_name)
+            self.marked_components.difference_update(self.components_of.get(base_name, ()))
+            # Parts not in the inventory right now would otherwise come back marked once acquired
+            prefix = base_name + " "
+            self.marked_components.difference_update([name for name in self.marked_components if name.startswith(prefix)])
+            return False
+        self.marked_sets.add(base_name)
+        return True
+    
+    def clear(self):
+        self.marked_sets.clear()
+        self.marked_components.clear()
+    
+    def to_json(self):
+        return {
+            "sets": sorted(self.marked_sets),
+            "components": sorted(self.marked_components)
+        }
+    
+    def load_json(self, data):
+        self.clear()
+        if isinstance(data, dict):
+            self.marked_sets.update(data.get("sets", []))
+            self.marked_components.update(data.get("components", []))
+            return
+        
+        # Legacy format: a flat list mixing component names and BASE:<set> markers
+        prefix_len = len(self.LEGACY_SET_PREFIX)
+        for entry in data or []:
+            if not isinstance(entry, str):
+                continue
+            if entry.startswith(self.LEGACY_SET_PREFIX):
+                self.marked_sets.add(entry[prefix_len:])
+            else:
+                self.marked_components.add(entry)
+
+class CombinedMarks:
+    def __init__(self, profiles):
+        self.profiles = profiles
+        self.set_of = {}
+        self.components_of = {}
+    
+    def set_membership(self, membership):
+        self.set_of, self.components_of = membership
+    
+    def set_items(self, items):
+        self.set_membership(MarkIndex.membership(items))
+    
+    @property
+    def marked_sets(self):
+        return set().union(*(profile.marks.marked_sets for profile in self.profiles))
+    
+    @property
+    def marked_components(self):
+        return set().union(*(profile.marks.marked_components for profile in self.profiles))
+    
+    def _item_owners(self, item_name):
+        return [profile for profile in self.profiles if item_name in profile.marks.set_of]
+    
+    def _set_owners(self, base_name):
+        return [profile for profile in self.profiles if base_name in profile.marks.components_of]
+    
+    def is_marked(self, item_name, base_name=None):
+        # A merged row only counts as marked when every account holding it marked it
+        owners = self._item_owners(item_name)
+        return bool(owners) and all(profile.marks.is_marked(item_name, base_name) for profile in owners)
+    
+    def is_set_marked(self, base_name):
+        owners = self._set_owners(base_name)
+        return bool(owners) and all(profile.marks.is_set_marked(base_name) for profile in owners)
+    
+    def toggle_item(self, item_name):
+        mark = not self.is_marked(item_name)
+        for profile in self._item_owners(item_name):
+            if profile.marks.is_marked(item_name) != mark:
+                profile.marks.toggle_item(item_name)
+        return self.is_marked(item_name)
+    
+    def toggle_set(self, base_name):
+        mark = not self.is_set_marked(base_name)
+        for profile in self._set_owners(base_name):
+            if profile.marks.is_set_marked(base_name) != mark:
+                profile.marks.toggle_set(base_name)
+        return mark
+    
+    def clear(self):
+        for profile in self.profiles:
+            profile.marks.clear()
+
+class PriceThresholdIndex:
+    def __init__(self):
+        self.entries = []
+        self.price_of = {}
+        self.threshold = None
+        self.marked = set()
+        self.excluded = set()
+    
+    def _names_between(self, low, high):
+        start = bisect.bisect_left(self.entries, (low,)) if low is not None else 0
+        end = bisect.bisect_left(self.entries, (high,)) if high is not None else len(self.entries)
+        return [item_name for _, item_name in self.entries[start:end]]
+    
+    def rebuild(self, prices):
+        self.price_of = dict(prices)
+        self.entries = sorted((price, item_name) for item_name, price in self.price_of.items())
+        self.excluded &= self.price_of.keys()
+        if self.threshold is None:
+            self.marked = set()
+        else:
+            self.marked = set(self._names_between(self.threshold, None)) - self.excluded
+    
+    def set_threshold(self, threshold):
+        old_threshold = self.threshold
+        if threshold == old_threshold:
+            return set(), set()
+        self.threshold = threshold
+        
+        if threshold is None:
+            removed = self.marked
+            self.marked = set()
+            self.excluded.clear()
+            return set(), removed
+        
+        # Manual exclusions only last until the threshold moves again
+        added = {item_name for item_name in self.excluded if self.price_of[item_name] >= threshold}
+        self.excluded.clear()
+        removed = set()
+        if old_threshold is None:
+            added.update(self._names_between(threshold, None))
+        elif threshold < old_threshold:
+            added.update(self._names_between(threshold, old_threshold))
+        else:
+            removed.update(self._names_between(old_threshold, threshold))
+            removed &= self.marked
+            added -= removed
+        
+        added -= self.marked
+        self.marked |= added
+        self.marked -= removed
+        return added, removed
+    
+    def update_price(self, item_name, price):
+        old_price = self.price_of.get(item_name)
+        if old_price == price:
+            return False
+        if old_price is not None:
+            idx = bisect.bisect_left(self.entries, (old_price, item_name))
+            if idx < len(self.entries) and self.entries[idx] == (old_price, item_name):
+                self.entries.pop(idx)
+            del self.price_of[item_name]
+        was_marked = item_name in self.marked
+        self.marked.discard(item_name)
+        self.excluded.discard(item_name)
+        if price is not None:
+            bisect.insort(self.entries, (price, item_name))
+            self.price_of[item_name] = price
+            if self.threshold is not None and price >= self.threshold:
+                self.marked.add(item_name)
+        return was_marked != (item_name in self.marked)
+    
+    def is_marked(self, item_name):
+        return item_name in self.marked
+    
+    def exclude(self, item_name):
+        if item_name in self.marked:
+            self.marked.remove(item_name)
+            self.excluded.add(item_name)
+    
+    def exclude_all(self):
+        self.excluded |= self.marked
+        self.marked = set()
+
+class TradeCounter:
+    def __init__(self):
+        self.items = {}
+        self.totals = {}
+        self.search_totals = {}
+        self.search_text = ""
+        self.matching = None
+    
+    @staticmethod
+    def _keys(state):
+        category = state["category"]
+        ducats = state["ducats"]
+        return ((None, None), (category, None), (None, ducats), (category, ducats))
+    
+    def _add(self, table, state, sign):
+        if state["marked"]:
+            return
+        delta = sign * state["amount"]
+        for key in self._keys(state):
+            table[key] = table.get(key, 0) + delta
+    
+    def _apply(self, item_name, state, sign):
+        self._add(self.totals, state, sign)
+        if self.matching is not None and item_name in self.matching:
+            self._add(self.search_totals, state, sign)
+    
+    @staticmethod
+    def _state(item, amount, is_marked):
+        item_name = item["name"]
+        return {
+            "category": item.get("category", "Unknown"),
+            "ducats": item.get("cost", 0),
+            "amount": amount,
+            "marked": is_marked(item_name, item.get("base_name")),
+            "name_lower": item_name.lower()
+        }
+    
+    def rebuild(self, items, is_marked):
+        self.items = {}
+        for item in items:
+            item_name = item["name"]
+            state = self.items.get(item_name)
+            if state is not None:
+                state["amount"] += item.get("amount", 0)
+                continue
+            self.items[item_name] = self._state(item, item.get("amount", 0), is_marked)
+        
+        self.totals = {}
+        for state in self.items.values():
+            self._add(self.totals, state, 1)
+        
+        search_text = self.search_text
+        self.search_text = ""
+        self.matching = None
+        self.search_totals = {}
+        self.set_search(search_text)
+    
+    def set_marked(self, item_name, marked):
+        state = self.items.get(item_name)
+        if state is None or state["marked"] == marked:
+            return
+        self._apply(item_name, state, -1)
+        state["marked"] = marked
+        self._apply(item_name, state, 1)
+    
+    def set_amount(self, item_name, amount):
+        state = self.items.get(item_name)
+        if state is None or state["amount"] == amount:
+            return
+        self._apply(item_name, state, -1)
+        state["amount"] = amount
+        self._apply(item_name, state, 1)
+    
+    def update_items(self, items, is_marked):
+        # A reload mostly changes a few counts, so only those items move the totals
+        amounts = {}
+        first = {}
+        for item in items:
+            item_name = item["name"]
+            amounts[item_name] = amounts.get(item_name, 0) + item.get("amount", 0)
+            first.setdefault(item_name, item)
+        
+        for item_name in [name for name in self.items if name not in amounts]:
+            self._remove(item_name)
+        
+        for item_name, amount in amounts.items():
+            item = first[item_name]
+            state = self.items.get(item_name)
+            if state is not None and (state["category"], state["ducats"]) != (item.get("category", "Unknown"), item.get("cost", 0)):
+                self._remove(item_name)
+                state = None
+            if state is None:
+                state = self.items[item_name] = self._state(item, amount, is_marked)
+                if self.matching is not None and self.search_text in state["name_lower"]:
+                    self.matching.add(item_name)
+                self._apply(item_name, state, 1)
+                continue
+            self.set_amount(item_name, amount)
+            self.set_marked(item_name, is_marked(item_name, item.get("base_name")))
+    
+    def _remove(self, item_name):
+        self._apply(item_name, self.items[item_name], -1)
+        del self.items[item_name]
+        if self.matching is not None:
+            self.matching.discard(item_name)
+    
+    def set_search(self, search_text):
+        old_text = self.search_text
+        if search_text == old_text:
+            return
+        self.search_text = search_text
+        
+        if not search_text:
+            self.matching = None
+            self.search_totals = {}
+            return
+        
+        if old_text and old_text in search_text:
+            # Narrowing the search can only drop current matches
+            for item_name in [name for name in self.matching if search_text not in self.items[name]["name_lower"]]:
+                self.matching.remove(item_name)
+                self._add(self.search_totals, self.items[item_name], -1)
+            return
+        
+        if old_text and search_text in old_text:
+            # Widening the search keeps every current match
+            candidates = [name for name in self.items if name not in self.matching]
+        else:
+            self.matching = set()
+            self.search_totals = {}
+            candidates = list(self.items)
+        
+        for item_name in candidates:
+            state = self.items[item_name]
+            if search_text in state["name_lower"]:
+                self.matching.add(item_name)
+                self._add(self.search_totals, state, 1)
+    
+    def total(self, category=None, ducats=None):
+        table = self.totals if self.matching is None else self.search_totals
+        return table.get((category, ducats), 0)
+
+def filter_view_items(items, prices, is_marked, category="ALL", show_marked=True, search_text="",
+                      ducat_filter="", amount_sort=0, platinum_sort=0):
+    filter_ducats = None
+    if ducat_filter:
+        try:
+            filter_ducats = int(ducat_filter)
+        except ValueError:
+            pass
+    
+    filtered_items = []
+    for item in items:
+        item_id = item["name"]
+        if category != "ALL" and item.get("category", "Unknown") != category:
+            continue
+        if not show_marked and is_marked(item_id, item.get("base_name", "")):
+            continue
+        if search_text and search_text not in item_id.lower():
+            continue
+        if filter_ducats is not None and item.get("cost", 0) != filter_ducats:
+            continue
+        filtered_items.append(item)
+    
+    if amount_sort != 0:
+        filtered_items.sort(key=lambda item: item.get("amount", 0), reverse=amount_sort == 2)
+    
+    if platinum_sort != 0:
+        def get_platinum_price(item):
+            price = entry_price(prices.get(item.get("name", "")))
+            return price if price is not None else 0
+        
+        filtered_items.sort(key=get_platinum_price, reverse=platinum_sort == 2)
+    
+    return filtered_items
+
+def item_row(item, price, is_marked):
+    ducats = item.get("cost", 0)
+    values = (
+        item["name"],
+        f"{item['amount']}",
+        str(ducats) if ducats > 0 else "",
+        str(price) if price is not None else "",
+        "✗ MARKED" if is_marked else ""
+    )
+    return values, ("marked",) if is_marked else ("normal",)
+
+def separator_row(base_name, is_marked):
+    values = (f"--- {base_name} ---", "", "", "", "✗ MARKED" if is_marked else "")
+    return values, ("separator", "marked") if is_marked else ("separator",)
+
+def flat_view_rows(filtered_items, prices, is_marked, is_set_marked):
+    # (row type, key, values, tags) for each Treeview row of the ungrouped view
+    rows = []
+    current_base = None
+    for item in filtered_items:
+        base_name = item.get("base_name", "")
+        if base_name and base_name != current_base:
+            current_base = base_name
+            rows.append(("set", base_name) + separator_row(base_name, is_set_marked(base_name)))
+        item_id = item["name"]
+        price = entry_price(prices.get(item_id))
+        rows.append(("item", item_id) + item_row(item, price, is_marked(item_id, base_name)))
+    return rows
+
+CATEGORY_FILES = {
+    "Warframes": ["Warframes.json"],
+    "Primary": ["Primary.json"],
+    "Secondary": ["Secondary.json"],
+    "Melee": ["Melee.json"],
+    "Companions": ["Sentinels.json", "SentinelWeapons.json"],
+    "Archwing": ["Arch-Gun.json", "Arch-Melee.json", "Archwing.json"]
+}
+
+def category_file_paths(cached_data_dir):
+    paths = {"ALL": None}
+    for category, filenames in CATEGORY_FILES.items():
+        paths[category] = [os.path.join(cached_data_dir, filename) for filename in filenames]
+    return paths
+
+class Catalog:
+    def __init__(self, primes=None, item_category_map=None, loaded_files=None):
+        self.primes = primes if primes is not None else []
+        self.item_category_map = item_category_map if item_category_map is not None else {}
+        self.loaded_files = loaded_files if loaded_files is not None else []
+
+SLIM_CATALOG_VERSION = 1
+SLIM_CATALOG_FILE = "catalog.slim.json"
+# Everything CatalogIndex and the view read from the category files
+SLIM_ITEM_FIELDS = ("name", "uniqueName", "isPrime", "category", "slot")
+SLIM_COMPONENT_FIELDS = ("uniqueName", "name", "type", "ducats", "primeSellingPrice", "tradable")
+
+def file_sha256(path):
+    # Only the slim catalog hashes anything, so hashlib is left out of the import
+    import hashlib
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _content_sha256(data):
+    import hashlib
+    return hashlib.sha256(json.dumps(data, sort_keys=True, separators=(",", ":")).encode('utf-8')).hexdigest()
+
+def slim_item(item):
+    slim = {field: item[field] for field in SLIM_ITEM_FIELDS if field in item}
+    if "components" in item:
+        slim["components"] = [
+            {field: component[field] for field in SLIM_COMPONENT_FIELDS if field in component}
+            for component in item["components"]
+        ]
+    return slim
+
+def build_slim_catalog(category_files):
+    categories = {}
+    for category, file_list in category_files.items():
+        if category == "ALL" or not file_list:
+            continue
+        if not isinstance(file_list, list):
+            file_list = [file_list]
+        
+        files = []
+        for filename in file_list:
+            if not os.path.exists(filename):
+                files.append({"name": os.path.basename(filename), "source_sha256": None, "items": []})
+                continue
+            with open(filename, 'r', encoding='utf-8') as f:
+                category_data = json.load(f)
+            files.append({
+                "name": os.path.basename(filename),
+                "source_sha256": file_sha256(filename),
+                "items": [slim_item(item) for item in category_data if item.get('isPrime', False)]
+            })
+        categories[category] = {"sha256": _content_sha256(files), "files": files}
+    return {"version": SLIM_CATALOG_VERSION, "built": time.time(), "categories": categories}
+
+def load_slim_catalog(path, category_files):
+    # {category: [(raw path, prime items)]} for each category whose slim copy is intact and was
+    # built from the raw files on disk; raw files that aren't there at all are served from the slim copy
+    data = read_json(path)
+    if not isinstance(data, dict) or data.get("version") != SLIM_CATALOG_VERSION:
+        return {}
+    slim_categories = data.get("categories")
+    if not isinstance(slim_categories, dict):
+        return {}
+    
+    usable = {}
+    for category, file_list in category_files.items():
+        entry = slim_categories.get(category)
+        if category == "ALL" or not file_list or not isinstance(entry, dict):
+            continue
+        if not isinstance(file_list, list):
+            file_list = [file_list]
+        try:
+            if _content_sha256(entry["files"]) != entry["sha256"]:
+                print(f"Error loading {path}: {category} is corrupted, using the raw files")
+                continue
+            slim_files = {slim_file["name"]: slim_file for slim_file in entry["files"]}
+        except (KeyError, TypeError):
+            continue
+        
+        loaded = []
+        for filename in file_list:
+            slim_file = slim_files.get(os.path.basename(filename))
+            if slim_file is None:
+                break
+            if os.path.exists(filename) and file_sha256(filename) != slim_file["source_sha256"]:
+                break
+            if slim_file["source_sha256"] is not None:
+                loaded.append((filename, slim_file["items"]))
+        else:
+            usable[category] = loaded
+    return usable
+
+@timed("catalog.load")
+def load_catalog(category_files, fallback_path=None, should_stop=None, slim_path=None):
+    primes = []
+    loaded_files = []
+    item_category_map = {}
+    slim_categories = load_slim_catalog(slim_path, category_files) if slim_path else {}
+    
+    for category, file_list in category_files.items():
+        if category == "ALL":
+            continue
+        if not file_list:
+            continue
+        if not isinstance(file_list, list):
+            file_list = [file_list]
+        
+        if category in slim_categories:
+            for filename, prime_items in slim_categories[category]:
+                for item in prime_items:
+                    unique_name = item.get('uniqueName', '')
+                    if unique_name:
+                        item_category_map[unique_name] = category
+                primes.extend(prime_items)
+                loaded_files.append(filename)
+            continue
+        
+        for filename in file_list:
+            if should_stop is not None and should_stop():
+                return None
+            if filename and os.path.exists(filename):
+                try:
+                    with open(filename, 'r', encoding='utf-8') as f:
+                        category_data = json.load(f)
+                    
+                    prime_items = [item for item in category_data if item.get('isPrime', False)]
+                    
+                    for item in prime_items:
+                        unique_name = item.get('uniqueName', '')
+                        if unique_name:
+                            item_category_map[unique_name] = category
+                    
+                    primes.extend(prime_items)
+                    loaded_files.append(filename)
+                except Exception as e:
+                    print(f"Error loading {filename}: {e}")
+    
+    if not loaded_files and fallback_path and os.path.exists(fallback_path):
+        with open(fallback_path, 'r', encoding='utf-8') as f:
+            fallback_data = json.load(f)
+        primes.extend(item for item in fallback_data if item.get('isPrime', False))
+        loaded_files.append(fallback_path)
+    
+    return Catalog(primes, item_category_map, loaded_files)
+
+def flatten_inventory(data, counts=None):
+    if counts is None:
+        counts = {}
+    if isinstance(data, dict):
+        for key, value in data.items():
+            if key == "ItemType" and isinstance(value, str):
+                item_count = data.get("ItemCount", 0)
+                if item_count > 0:
+                    counts[value] = item_count
+            elif isinstance(value, (dict, list)):
+                flatten_inventory(value, counts)
+    elif isinstance(data, list):
+        for item in data:
+            if isinstance(item, (dict, list)):
+                flatten_inventory(item, counts)
+    return counts
+
+def load_inventory(path):
+    with metrics.span("inventory.parse"):
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    with metrics.span("inventory.flatten"):
+        return flatten_inventory(data)
+
+VALID_COMPONENT_TYPES = {
+    'Blueprint', 'Barrel', 'Receiver', 'Stock', 'Link', 
+    'Blade', 'Hilt', 'Handle', 'Grip', 'Lower Limb', 'Upper Limb',
+    'String', 'Chassis', 'Neuroptics', 'Systems', 'Harness',
+    'Cerebrum', 'Carapace', 'Wings', 'Head', 'Gauntlet',
+    'Boot', 'Blades', 'Disc', 'Ornament', 'Stars', 'Chain',
+    'Pouch', 'Band', 'Buckle', 'Prime Blueprint'
+}
+
+RESOURCE_KEYWORDS = [
+    'Orokin Cell', 'Neurodes', 'Argon Crystal', 'Cryotic', 'Ferrite',
+    'Alloy Plate', 'Rubedo', 'Plastids', 'Nano Spores', 'Polymer Bundle',
+    'Circuits', 'Salvage', 'Nano Spores', 'Control Module', 'Morphics',
+    'Gallium', 'Neural Sensors', 'Oxium', 'Tellurium', 'Hexenon',
+    'Thrax Plasm', 'Entrati Lanthorn', 'Voidgel Orb', 'Tauforged Shard'
+]
+
+SLOT_TO_CATEGORY = {
+    0: 'Warframes',
+    1: 'Primary',
+    2: 'Secondary',
+    3: 'Melee',
+    4: 'Companions',
+    5: 'Archwing'
+}
+
+def is_tradeable_component(component):
+    component_name = component.get('name', '')
+    if component.get('type', '') == 'Resource':
+        return False
+    
+    component_name_lower = component_name.lower()
+    if any(keyword.lower() in component_name_lower for keyword in RESOURCE_KEYWORDS):
+        return False
+    
+    for valid_type in VALID_COMPONENT_TYPES:
+        valid_type_lower = valid_type.lower()
+        if (component_name_lower == valid_type_lower or 
+            component_name_lower.startswith(valid_type_lower + ' ') or
+            component_name_lower.endswith(' ' + valid_type_lower) or
+            ' ' + valid_type_lower + ' ' in ' ' + component_name_lower + ' '):
+            return True
+    
+    has_ducats = component.get('ducats', 0) > 0
+    has_prime_price = component.get('primeSellingPrice', 0) > 0
+    is_tradable = component.get('tradable', False)
+    return has_ducats or has_prime_price or is_tradable
+
+def inventory_paths_for(component_unique_name):
+    # Inventory paths to try in order; the first one we own decides the count
+    paths = [component_unique_name]
+    unique_name_parts = component_unique_name.split('/')
+    item_name_part = unique_name_parts[-1] if unique_name_parts else ""
+    if not item_name_part:
+        return paths, None
+    
+    if "/Items/Warframes/" in component_unique_name or "/Types/Items/Warframes/" in component_unique_name:
+        recipe_path = component_unique_name.replace("/Items/Warframes/", "/Recipes/WarframeRecipes/")
+        recipe_path = recipe_path.replace("/Types/Items/Warframes/", "/Types/Recipes/WarframeRecipes/")
+        if recipe_path.endswith("Component"):
+            recipe_path = recipe_path.replace("Component", "Blueprint")
+        elif not recipe_path.endswith("Blueprint"):
+            recipe_path = recipe_path + "Blueprint"
+        paths.append(recipe_path)
+    
+    if item_name_part.endswith("Component"):
+        blueprint_name = item_name_part.replace("Component", "Blueprint")
+        paths.append(f"/Lotus/Types/Recipes/WarframeRecipes/{blueprint_name}")
+    elif not item_name_part.endswith("Blueprint"):
+        paths.append(f"/Lotus/Types/Recipes/WarframeRecipes/{item_name_part}Blueprint")
+    else:
+        paths.append(f"/Lotus/Types/Recipes/WarframeRecipes/{item_name_part}")
+    
+    paths.append(f"/Lotus/Types/Recipes/Weapons/{item_name_part}Blueprint")
+    paths.append(f"/Lotus/Types/Recipes/Weapons/{item_name_part}")
+    
+    base_name = item_name_part
+    if base_name.endswith("Component"):
+        base_name = base_name.replace("Component", "")
+    elif base_name.endswith("Blueprint"):
+        base_name = base_name.replace("Blueprint", "")
+    
+    search_names = [base_name]
+    if "Helmet" in base_name:
+        search_names.append(base_name.replace("Helmet", "Neuroptics"))
+    
+    return paths, search_names
+
+class CatalogIndex:
+    def __init__(self, primes, item_category_map=None):
+        if item_category_map is None:
+            item_category_map = {}
+        self.entries = []
+        self.search_names = set()
+        
+        for prime_item in primes:
+            prime_name = prime_item.get('name', '')
+            if not prime_name or 'Prime' not in prime_name:
+                continue
+            
+            if 'Galariak Prime' in prime_name or 'Sagek Prime' in prime_name:
+                continue
+            
+            category = item_category_map.get(prime_item.get('uniqueName', ''), 'Unknown')
+            if category == 'Unknown':
+                category = prime_item.get('category', 'Unknown')
+            if category == 'Unknown':
+                category = SLOT_TO_CATEGORY.get(prime_item.get('slot', -1), 'Unknown')
+            
+            for component in prime_item.get('components', []):
+                component_unique_name = component.get('uniqueName', '')
+                if not component_unique_name or not is_tradeable_component(component):
+                    continue
+                
+                paths, search_names = inventory_paths_for(component_unique_name)
+                if search_names:
+                    self.search_names.update(search_names)
+                self.entries.append((
+                    prime_name,
+                    component.get('name', ''),
+                    component.get('ducats', 0),
+                    category,
+                    paths,
+                    search_names
+                ))
+    
+    def _recipe_names(self, inv_path):
+        names = set()
+        if inv_path.endswith("Blueprint"):
+            stem = inv_path[:-len("Blueprint")]
+            for start in range(len(stem) + 1):
+                if stem[start:] in self.search_names:
+                    names.add(stem[start:])
+        end = inv_path.find("Blueprint")
+        while end != -1:
+            name = inv_path[inv_path.rfind("/", 0, end) + 1:end]
+            if "/" + name + "Blueprint" in inv_path and name in self.search_names:
+                names.add(name)
+            end = inv_path.find("Blueprint", end + 1)
+        return names
+    
+    def _recipe_matches(self, inventory_counts):
+        # Equivalent to scanning the inventory for "<name>Blueprint" recipes once per
+        # unmatched part, but done in a single pass: the earliest owned recipe wins
+        matches = {}
+        for order, (inv_path, inv_count) in enumerate(inventory_counts.items()):
+            if inv_count <= 0 or "/Recipes/" not in inv_path:
+                continue
+            for name in self._recipe_names(inv_path):
+                if name not in matches:
+                    matches[name] = (order, inv_count)
+        return matches
+    
+    @timed("inventory.resolve")
+    def resolve(self, inventory_counts):
+        inventory_items = []
+        recipe_matches = None
+        
+        for prime_name, component_name, ducats, category, paths, search_names in self.entries:
+            item_count = 0
+            for path in paths:
+                item_count = inventory_counts.get(path, 0)
+                if item_count:
+                    break
+            
+            if item_count == 0 and search_names:
+                if recipe_matches is None:
+                    recipe_matches = self._recipe_matches(inventory_counts)
+                found = [recipe_matches[name] for name in search_names if name in recipe_matches]
+                if found:
+                    item_count = min(found)[1]
+            
+            if item_count > 0:
+                inventory_items.append({
+                    "name": f"{prime_name} {component_name}",
+                    "amount": item_count,
+                    "owned": False,
+                    "cost": ducats,
+                    "rarity": "Unknown",
+                    "base_name": prime_name,
+                    "component_type": component_name,
+                    "category": category
+                })
+        
+        inventory_items.sort(key=lambda x: (x["base_name"], x["component_type"]))
+        return inventory_items
+
+def resolve_parts(primes, inventory_counts, item_category_map=None):
+    return CatalogIndex(primes, item_category_map).resolve(inventory_counts)
+
+class ViewSnapshot:
+    # Bump when resolved parts change shape, so old snapshots are rebuilt instead of shown
+    VERSION = 1
+    
+    def __init__(self, path):
+        self.path = path
+        self._writer = WriteBehindFile(path, delay=1.0)
+    
+    @classmethod
+    def sources(cls, paths):
+        files = {}
+        for path in paths:
+            try:
+                stat = os.stat(path)
+                files[path] = [stat.st_mtime_ns, stat.st_size]
+            except OSError:
+                files[path] = None
+        return {"version": cls.VERSION, "files": files}
+    
+    def load(self):
+        data = read_json(self.path)
+        if not isinstance(data, dict) or not isinstance(data.get('profiles'), dict):
+            return None
+        if (data.get('sources') or {}).get('version') != self.VERSION:
+            return None
+        return data
+    
+    def save(self, sources, parts_by_profile):
+        self._writer.schedule({"sources": sources, "profiles": parts_by_profile})
+    
+    def close(self):
+        self._writer.close()
+
+MAIN_PROFILE = "Main"
+
+class Profile:
+    def __init__(self, name, inventory_path, marks_path, legacy_marks_path=None):
+        self.name = name
+        self.inventory_path = inventory_path
+        self.marks_path = marks_path
+        self.legacy_marks_path = legacy_marks_path
+        self.marks = MarkIndex()
+        self.items = []
+        self._writer = None
+    
+    def load_marks(self):
+        marks_path = self.marks_path
+        if not os.path.exists(marks_path) and self.legacy_marks_path and os.path.exists(self.legacy_marks_path):
+            marks_path = self.legacy_marks_path
+        if os.path.exists(marks_path):
+            try:
+                with open(marks_path, 'r') as f:
+                    self.marks.load_json(json.load(f))
+            except:
+                self.marks.clear()
+        return self.marks
+    
+    def save_marks(self):
+        if self._writer is None:
+            self._writer = WriteBehindFile(self.marks_path)
+        self._writer.schedule(self.marks.to_json())
+    
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+def profile_file_name(name):
+    return re.sub(r'[^A-Za-z0-9_.-]+', '_', name)
+
+def discover_profiles(base_dir, cached_data_dir, settings):
+    # Older versions saved marks next to the current working directory
+    profiles = [Profile(
+        MAIN_PROFILE,
+        os.path.join(cached_data_dir, "inventory.json"),
+        os.path.join(base_dir, "marked_items.json"),
+        legacy_marks_path="marked_items.json"
+    )]
+    names = {MAIN_PROFILE}
+    
+    for name, inventory_path in (settings.get("profiles") or {}).items():
+        if name in names:
+            continue
+        names.add(name)
+        profiles.append(Profile(
+            name,
+            os.path.join(base_dir, inventory_path),
+            os.path.join(base_dir, f"marked_items_{profile_file_name(name)}.json")
+        ))
+    
+    profiles_dir = os.path.join(cached_data_dir, "profiles")
+    if os.path.isdir(profiles_dir):
+        for name in sorted(os.listdir(profiles_dir)):
+            profile_dir = os.path.join(profiles_dir, name)
+            inventory_path = os.path.join(profile_dir, "inventory.json")
+            if name in names or not os.path.isfile(inventory_path):
+                continue
+            names.add(name)
+            profiles.append(Profile(name, inventory_path, os.path.join(profile_dir, "marked_items.json")))
+    
+    return profiles
+
+def merge_parts(parts_by_profile):
+    merged = {}
+    for profile_name, parts in parts_by_profile.items():
+        # Some sets list the same component twice, keep one merged row per occurrence
+        seen = {}
+        for part in parts:
+            occurrence = seen.get(part["name"], 0)
+            seen[part["name"]] = occurrence + 1
+            key = (part["name"], occurrence)
+            entry = merged.get(key)
+            if entry is None:
+                entry = dict(part, amount=0, profiles={})
+                merged[key] = entry
+            entry["amount"] += part["amount"]
+            entry["profiles"][profile_name] = entry["profiles"].get(profile_name, 0) + part["amount"]
+    items = list(merged.values())
+    items.sort(key=lambda x: (x["base_name"], x["component_type"]))
+    return items
+
+class Engine:
+    SLUG_RESULT_TTL = 300
+    
+    def __init__(self, base_dir=None, settings=None):
+        self.base_dir = base_dir or get_base_directory()
+        self.cached_data_dir = os.path.join(self.base_dir, "cachedData")
+        if settings is None:
+            settings = load_settings(os.path.join(self.base_dir, "settings.json"))
+        self.settings = settings
+        if settings.get("metrics"):
+            metrics.enabled = True
+        if settings.get("memory_report"):
+            memory.start()
+        self.low_memory = bool(settings.get("low_memory"))
+        self.category_files = category_file_paths(self.cached_data_dir)
+        self.slim_catalog_path = os.path.join(self.cached_data_dir, SLIM_CATALOG_FILE)
+        self.catalog = None
+        self.index = None
+        
+        self.prices = PriceTable()
+        self.price_cache_file = os.path.join(self.cached_data_dir, "price_cache.json")
+        self.on_shared_prices = None
+        self._price_cache_mtime = None
+        self._sync_lock = threading.Lock()
+        self.load_price_cache()
+        # Other running instances write the same cache, so saves merge instead of overwrite
+        self.price_cache_writer = WriteBehindFile(
+            self.price_cache_file,
+            delay=2.0,
+            indent=2,
+            merge=self._merge_price_cache
+        )
+        self.rate_budget = SharedRateBudget(os.path.join(self.cached_data_dir, "rate_budget.json"))
+        self.http_cache = ResponseMetaCache(os.path.join(self.cached_data_dir, "http_cache.json"))
+        self.price_source = MarketPriceSource(self.settings["market_api_url"], http_cache=self.http_cache)
+        self.price_ttl = PriceTTLPolicy(
+            floor=self.settings["price_ttl_floor"],
+            ceiling=self.settings["price_ttl_ceiling"]
+        )
+        self.fetcher = PriceFetcher(
+            self.price_source,
+            self.prices,
+            self.price_ttl,
+            rate=self.settings["market_rate"],
+            slug_result_ttl=self.SLUG_RESULT_TTL,
+            on_record=self._on_price_recorded,
+            rate_budget=self.rate_budget,
+            before_fetch=self.sync_price_cache,
+            claim_handoff=self.price_cache_writer.delay + 1.0
+        )
+    
+    def _cache_mtime(self):
+        try:
+            return os.stat(self.price_cache_file).st_mtime_ns
+        except OSError:
+            return None
+    
+    def load_price_cache(self):
+        self._price_cache_mtime = self._cache_mtime()
+        entries = read_json(self.price_cache_file, {})
+        self.prices.replace(entries if isinstance(entries, dict) else {})
+    
+    def _adopt_prices(self, entries):
+        if not isinstance(entries, dict):
+            return {}
+        current = self.prices.snapshot()
+        adopted = {
+            item_name: entry for item_name, entry in entries.items()
+            if entry_timestamp(entry) > entry_timestamp(current.get(item_name))
+        }
+        if adopted:
+            self.prices.update_many(adopted)
+            if self.on_shared_prices is not None:
+                self.on_shared_prices(adopted)
+        return adopted
+    
+    def sync_price_cache(self):
+        # Picks up prices other instances saved since we last looked; a stat when nothing changed
+        with self._sync_lock:
+            mtime = self._cache_mtime()
+            if mtime is None or mtime == self._price_cache_mtime:
+                return {}
+            self._price_cache_mtime = mtime
+            return self._adopt_prices(read_json(self.price_cache_file, {}))
+    
+    def _merge_price_cache(self, on_disk, entries):
+        self._adopt_prices(on_disk)
+        return merge_price_entries(on_disk, entries)
+    
+    def save_price_cache(self):
+        self.price_cache_writer.schedule(self.prices.to_json())
+    
+    def _on_price_recorded(self, item_name, entry):
+        # Not-found results are saved too, so other instances waiting on this item stop waiting
+        self.save_price_cache()
+    
+    def profiles(self):
+        return discover_profiles(self.base_dir, self.cached_data_dir, self.settings)
+    
+    def inventory_path(self):
+        return os.path.join(self.cached_data_dir, "inventory.json")
+    
+    def view_sources(self, profiles):
+        # Everything a resolved view depends on; any change here means re-resolving
+        paths = [profile.inventory_path for profile in profiles]
+        for file_list in self.category_files.values():
+            paths.extend(file_list or ())
+        paths.append(os.path.join(self.cached_data_dir, "Primary.json"))
+        paths.append(self.slim_catalog_path)
+        return ViewSnapshot.sources(paths)
+    
+    def load_catalog(self, should_stop=None):
+        catalog = load_catalog(
+            self.category_files,
+            os.path.join(self.cached_data_dir, "Primary.json"),
+            should_stop,
+            self.slim_catalog_path
+        )
+        if catalog is not None:
+            self.catalog = catalog
+            self.index = None
+            if self.low_memory:
+                # The index is all resolving needs; the full item dicts are most of the catalog's memory
+                self.catalog_index()
+                catalog.primes = []
+        return catalog
+    
+    def load_inventory(self, path=None):
+        return load_inventory(path or self.inventory_path())
+    
+    def catalog_index(self):
+        if self.index is None:
+            catalog = self.catalog or self.load_catalog()
+            with metrics.span("catalog.index"):
+                self.index = CatalogIndex(catalog.primes, catalog.item_category_map)
+        return self.index
+    
+    def resolve_parts(self, inventory_counts):
+        return self.catalog_index().resolve(inventory_counts)
+    
+    def price_parts(self, parts, force_refresh=False, job=None, on_result=None):
+        self.sync_price_cache()
+        item_names = list(dict.fromkeys(part['name'] for part in parts if part.get('name')))
+        self.fetcher.fetch_many(item_names, force_refresh=force_refresh, job=job, on_result=on_result)
+        self.save_price_cache()
+        snapshot = self.prices.snapshot()
+        return {item_name: entry_price(snapshot.get(item_name)) for item_name in item_names}
+    
+    def close(self):
+        self.price_cache_writer.close()
+        self.http_cache.close()
+        self.rate_budget.close()
+
+memory.register("catalog", load_catalog, load_slim_catalog, Catalog)
+memory.register("catalog index", CatalogIndex.__init__, inventory_paths_for)
+memory.register("inventory", load_inventory, flatten_inventory)
+memory.register("parts", CatalogIndex.resolve, CatalogIndex._recipe_matches, merge_parts, ViewSnapshot)
+memory.register("marks", MarkIndex, CombinedMarks, Profile)
+memory.register("prices", PriceTable, PriceFetcher, MarketPriceSource, ResponseMetaCache, PriceTTLPolicy, SweepCheckpoint,
+                Engine.load_price_cache, Engine._adopt_prices, Engine.sync_price_cache, Engine._merge_price_cache)
+memory.register("view", filter_view_items, flat_view_rows, item_row, separator_row, TradeCounter, PriceThresholdIndex)
+memory.register("metrics", Metrics)
@@ -1,45 +1,183 @@
+import time
+
+_STARTUP_BEGIN = time.perf_counter()
+
 import tkinter as tk
 from tkinter import ttk, messagebox
-import json
 import os
 import sys
-import time
-import subprocess
 import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+import queue
 from datetime import datetime
-import urllib.request
-import urllib.error
-import re
 
-try:
-    from PIL import Image, ImageTk
-    PIL_AVAILABLE = True
-except ImportError:
-    PIL_AVAILABLE = False
+from ducanator_core import (
+    MAIN_PROFILE,
+    CombinedMarks,
+    Engine,
+    MarkIndex,
+    PriceThresholdIndex,
+    SweepCheckpoint,
+    TradeCounter,
+    ViewSnapshot,
+    entry_price,
+    filter_view_items,
+    flat_view_rows,
+    get_base_directory,
+    item_row,
+    load_inventory,
+    memory,
+    merge_parts,
+    metrics,
+    timed,
+    write_json_atomic,
+)
+
+_STARTUP_IMPORTED = time.perf_counter()
+
+class StartupTimer:
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.phases = []
+        self._last = _STARTUP_BEGIN
+        if enabled:
+            self.mark("imports", _STARTUP_IMPORTED)
+    
+    def mark(self, label, now=None):
+        if not self.enabled:
+            return
+        if now is None:
+            now = time.perf_counter()
+        self.phases.append((label, (now - self._last) * 1000.0))
+        self._last = now
+    
+    def report(self):
+        total = sum(ms for _, ms in self.phases)
+        lines = ["Startup timing (ms):"]
+        for label, ms in self.phases:
+            lines.append(f"  {label:<28}{ms:9.1f}")
+        lines.append(f"  {'total':<28}{total:9.1f}")
+        return "\n".join(lines)
+
+class Job:
+    def __init__(self, scheduler, kind):
+        self.scheduler = scheduler
+        self.kind = kind
+        self.future = None
+        self._cancelled = threading.Event()
+    
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+    
+    def cancel(self):
+        self._cancelled.set()
+    
+    def wait(self, timeout):
+        return self._cancelled.wait(timeout)
+    
+    def post(self, callback, *args, **kwargs):
+        self.scheduler._ui_queue.put((self, callback, args, kwargs))
 
-def get_base_directory():
-    if getattr(sys, 'frozen', False):
-        return os.path.dirname(sys.executable)
-    else:
-        return os.path.dirname(os.path.abspath(__file__))
+class TaskScheduler:
+    def __init__(self, max_workers=4):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ducanator-job")
+        self._lock = threading.Lock()
+        self._active = {}
+        self._kind_locks = {}
+        self._ui_queue = queue.Queue()
+    
+    def submit(self, kind, fn, *args, supersedes=(), **kwargs):
+        with self._lock:
+            for other_kind in supersedes:
+                for other_job in self._active.get(other_kind, ()):
+                    other_job.cancel()
+            job = Job(self, kind)
+            self._active.setdefault(kind, set()).add(job)
+            kind_lock = self._kind_locks.setdefault(kind, threading.Lock())
+        job.future = self._executor.submit(self._run, job, kind_lock, fn, args, kwargs)
+        return job
+    
+    def _run(self, job, kind_lock, fn, args, kwargs):
+        try:
+            # Jobs of one kind never overlap; a superseding job waits for the old one to wind down
+            with kind_lock:
+                if job.cancelled:
+                    return None
+                return fn(job, *args, **kwargs)
+        except Exception:
+            traceback.print_exc()
+        finally:
+            with self._lock:
+                self._active[job.kind].discard(job)
+    
+    def is_running(self, kind=None):
+        with self._lock:
+            if kind is not None:
+                return bool(self._active.get(kind))
+            return any(self._active.values())
+    
+    def cancel(self, kind):
+        with self._lock:
+            for job in self._active.get(kind, ()):
+                job.cancel()
+    
+    def post(self, callback, *args, **kwargs):
+        self._ui_queue.put((None, callback, args, kwargs))
+    
+    def drain(self):
+        while True:
+            try:
+                job, callback, args, kwargs = self._ui_queue.get_nowait()
+            except queue.Empty:
+                return
+            if job is not None and job.cancelled:
+                continue
+            try:
+                callback(*args, **kwargs)
+            except Exception:
+                traceback.print_exc()
+    
+    def shutdown(self):
+        with self._lock:
+            for jobs in self._active.values():
+                for job in jobs:
+                    job.cancel()
+        self._executor.shutdown(wait=False)
 
 class Ducanator:
-    def __init__(self, root):
+    REFRESH_INTERVAL = 0.25
+    METRICS_INTERVAL = 1000
+    UI_PUMP_INTERVAL = 50
+    ALL_PROFILES = "All Profiles"
+    
+    def __init__(self, root, startup_timer=None):
         self.root = root
+        self.startup_timer = startup_timer or StartupTimer()
+        self.startup_timer.mark("create window")
         self.root.title("Ducanator")
         self.root.geometry("800x1000")
         self.root.configure(bg="#0f0f0f")
         self.root.attributes('-topmost', True)
         
-        self.marked_items_file = "marked_items.json"
-        self.marked_items = self.load_marked_items()
-        self.platinum_filter_marked = set()
+        self.engine = Engine(get_base_directory())
+        self.engine.on_shared_prices = self._on_shared_prices
+        self.startup_timer.mark("engine and price cache")
+        self.profiles = self.engine.profiles()
+        for profile in self.profiles:
+            profile.load_marks()
+        self.startup_timer.mark("profiles and marks")
+        self.loaded_profiles = []
+        self.active_profile = MAIN_PROFILE
+        self.marks = self.profiles[0].marks
+        self.combined_marks = CombinedMarks([])
+        self.all_items = []
+        self.price_filter = PriceThresholdIndex()
+        self.trade_counter = TradeCounter()
         
         self.data_source = "Not loaded"
         self.inventory_data = []
-        self.primary_items = []
-        self.inventory_dict = {}
-        self.item_category_map = {}
         
         self.search_text = ""
         self.ducat_filter = ""
@@ -49,350 +187,331 @@ class Ducanator:
         self.show_marked = True
         self.selected_category = "ALL"
         
-        base_dir = get_base_directory()
-        self.cached_data_dir = os.path.join(base_dir, "cachedData")
+        self.group_sets = False
+        self._open_sets = set()
+        
+        self._row_keys = {}
+        self._rows_by_item = {}
+        self._set_rows = {}
+        self._set_items = {}
+        self._pending_children = {}
+        self._refresh_pending = False
+        self._last_refresh = 0.0
+        
+        self.cached_data_dir = self.engine.cached_data_dir
         
         self.ducat_icon_small = None
+        self.metrics_panel = None
+        self._metrics_after = None
+        self._memory_text = ""
+        
+        self.prices = self.engine.prices
+        self.price_ttl = self.engine.price_ttl
+        self.fetcher = self.engine.fetcher
+        self.sweep = SweepCheckpoint(os.path.join(self.cached_data_dir, "price_sweep.json"))
+        self.sweep.load()
+        self.view_snapshot = ViewSnapshot(os.path.join(self.cached_data_dir, "view_snapshot.json"))
+        self._view_sources = None
+        self.scheduler = TaskScheduler()
         
-        self.price_cache = {}
-        self.price_cache_file = os.path.join(self.cached_data_dir, "price_cache.json")
-        self.load_price_cache()
-        self.price_fetch_in_progress = False
-        
-        self.category_files = {
-            "ALL": None,
-            "Warframes": [os.path.join(self.cached_data_dir, "Warframes.json")],
-            "Primary": [os.path.join(self.cached_data_dir, "Primary.json")],
-            "Secondary": [os.path.join(self.cached_data_dir, "Secondary.json")],
-            "Melee": [os.path.join(self.cached_data_dir, "Melee.json")],
-            "Companions": [
-                os.path.join(self.cached_data_dir, "Sentinels.json"),
-                os.path.join(self.cached_data_dir, "SentinelWeapons.json")
-            ],
-            "Archwing": [
-                os.path.join(self.cached_data_dir, "Arch-Gun.json"),
-                os.path.join(self.cached_data_dir, "Arch-Melee.json"),
-                os.path.join(self.cached_data_dir, "Archwing.json")
-            ]
-        }
+        self.startup_timer.mark("sweep, snapshot, scheduler")
         
         self.setup_ui()
-        self.load_inventory_from_json()
-        self.refresh_display()
+        self.startup_timer.mark("build widgets")
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        self._pump_ui_queue()
+        # Show the last resolved view right away; the load below only redoes it if a file changed
+        if not self._restore_view_snapshot():
+            self.refresh_display()
+        self.startup_timer.mark("first view")
+        # Everything else waits until the window has been drawn once
+        self.root.after_idle(self._after_first_frame)
     
-    def load_marked_items(self):
-        if os.path.exists(self.marked_items_file):
-            try:
-                with open(self.marked_items_file, 'r') as f:
-                    return set(json.load(f))
-            except:
-                return set()
-        return set()
+    def _after_first_frame(self):
+        self.root.update_idletasks()
+        self.startup_timer.mark("first frame")
+        # Without a snapshot the first refresh_display has already started the load
+        if not self.scheduler.is_running("load"):
+            self.load_inventory_from_json()
+        self._load_icons()
+        self.startup_timer.mark("icons")
+        if self.startup_timer.enabled:
+            self._wait_for_startup_load()
+    
+    def _wait_for_startup_load(self):
+        if self.scheduler.is_running("load"):
+            self.root.after(10, self._wait_for_startup_load)
+            return
+        self.startup_timer.mark("inventory validated")
+        print(self.startup_timer.report())
+        self.on_close()
+    
+    def _profile(self, name):
+        return next((profile for profile in self.profiles if profile.name == name), None)
     
     def save_marked_items(self):
-        with open(self.marked_items_file, 'w') as f:
-            json.dump(list(self.marked_items), f)
+        if self.active_profile == self.ALL_PROFILES:
+            for profile in self.loaded_profiles:
+                profile.save_marks()
+            return
+        profile = self._profile(self.active_profile)
+        if profile is not None:
+            profile.save_marks()
     
-    def load_price_cache(self):
-        if os.path.exists(self.price_cache_file):
-            try:
-                with open(self.price_cache_file, 'r', encoding='utf-8') as f:
-                    self.price_cache = json.load(f)
-            except:
-                self.price_cache = {}
-        else:
-            self.price_cache = {}
+    def on_close(self):
+        self.scheduler.shutdown()
+        for profile in self.profiles:
+            profile.close()
+        self.engine.close()
+        self.sweep.close()
+        self.view_snapshot.close()
+        self.root.destroy()
     
     def save_price_cache(self):
-        try:
-            with open(self.price_cache_file, 'w', encoding='utf-8') as f:
-                json.dump(self.price_cache, f, indent=2)
-        except:
-            pass
+        self.engine.save_price_cache()
     
-    def item_name_to_slug(self, item_name):
-        slug = item_name.lower().strip()
-        slug = slug.replace('&', 'and')
-        slug = re.sub(r'\s+', '_', slug)
-        slug = re.sub(r'[^a-z0-9_]', '', slug)
-        
-        if 'kompressa' in slug and 'receiver' in slug:
-            slug = slug.replace('receiver', 'reciever')
-        
-        return slug
-    
-    def get_warframe_slug_variations(self, item_name):
-        component_types = ['neuroptics', 'chassis', 'systems']
-        item_lower = item_name.lower()
-        base_slug = self.item_name_to_slug(item_name)
-        variations = [base_slug]
-        
-        if 'prime' in item_lower:
-            for component in component_types:
-                if component in item_lower:
-                    slug_parts = base_slug.split('_')
-                    if 'prime' in slug_parts:
-                        prime_idx = slug_parts.index('prime')
-                        if prime_idx > 0:
-                            warframe_name = slug_parts[prime_idx - 1]
-                            variation_with_blueprint = f"{warframe_name}_prime_{component}_blueprint"
-                            if variation_with_blueprint not in variations:
-                                variations.append(variation_with_blueprint)
-                    break
-        
-        return variations
+    def _get_cached_price(self, item_name, prices=None):
+        if prices is None:
+            return self.prices.price_of(item_name)
+        return entry_price(prices.get(item_name))
+    
+    def _rebuild_price_index(self):
+        snapshot = self.prices.snapshot()
+        prices = {}
+        for item in self.inventory_data:
+            price = self._get_cached_price(item["name"], snapshot)
+            if price is not None:
+                prices[item["name"]] = price
+        previously_marked = self.price_filter.marked
+        self.price_filter.rebuild(prices)
+        self._sync_marks(previously_marked ^ self.price_filter.marked)
+    
+    def _pump_ui_queue(self):
+        self.scheduler.drain()
+        self.root.after(self.UI_PUMP_INTERVAL, self._pump_ui_queue)
     
-    def _calculate_reasonable_price(self, prices):
-        if not prices:
-            return None
+    def _publish_price(self, item_name, price):
+        self.scheduler.post(self._apply_price_update, item_name, price)
+    
+    def _on_shared_prices(self, entries):
+        # Prices another running instance fetched and saved
+        for item_name, entry in entries.items():
+            self._publish_price(item_name, entry_price(entry))
+    
+    def _apply_price_update(self, item_name, price):
+        platinum_price = str(price) if price is not None else ""
+        for row_id in self._rows_by_item.get(item_name, ()):
+            self.tree.set(row_id, "Platinum", platinum_price)
+        
+        if self.price_filter.update_price(item_name, price):
+            self._sync_marks((item_name,))
+            if not self.show_marked:
+                self._schedule_refresh()
+            else:
+                self._update_row_marks(item_name)
         
-        sorted_prices = sorted(prices)
-        filtered_prices = sorted_prices.copy()
+        if self.group_sets:
+            self._update_set_row(self.marks.set_of.get(item_name))
         
-        changed = True
-        while changed and len(filtered_prices) > 1:
-            changed = False
-            for i in range(len(filtered_prices) - 1):
-                if filtered_prices[i] < (filtered_prices[i + 1] / 2.0):
-                    filtered_prices.pop(i)
-                    changed = True
-                    break
+        if self.platinum_sort_state != 0:
+            self._schedule_refresh()
         
-        if len(filtered_prices) < max(1, len(sorted_prices) * 0.25):
-            filtered_prices = sorted_prices
+        self.update_full_trade_counter()
+    
+    def _update_row_marks(self, item_name):
+        is_marked = self.is_item_marked(item_name)
+        status = "✗ MARKED" if is_marked else ""
+        tags = ("marked",) if is_marked else ("normal",)
+        for row_id in self._rows_by_item.get(item_name, ()):
+            self.tree.set(row_id, "Status", status)
+            self.tree.item(row_id, tags=tags)
+    
+    def _schedule_refresh(self):
+        if self._refresh_pending:
+            return
+        self._refresh_pending = True
+        delay = self._last_refresh + self.REFRESH_INTERVAL - time.monotonic()
+        self.root.after(max(0, int(delay * 1000)), self._run_scheduled_refresh)
+    
+    def _run_scheduled_refresh(self):
+        self._refresh_pending = False
+        self.refresh_display()
+    
+    def _on_inventory_loaded(self):
+        self._update_profile_selector()
+        self._rebuild_price_index()
+        self.trade_counter.update_items(self.inventory_data, self.is_item_marked)
+        self.refresh_display()
+    
+    def _sync_marks(self, item_names):
+        for item_name in item_names:
+            self.trade_counter.set_marked(item_name, self.is_item_marked(item_name))
+    
+    def fetch_prices_for_items(self, items, force_refresh=False):
+        if force_refresh:
+            # A forced refresh is checkpointed so it can pick up where it stopped after a restart
+            self.sweep.start(
+                [item.get('name', '') for item in items if item.get('name') and not item['name'].startswith('---')],
+                time.time()
+            )
+        self.scheduler.submit(
+            "price_fetch",
+            self._fetch_prices_job,
+            list(items),
+            force_refresh,
+            supersedes=("price_fetch",)
+        )
+    
+    @timed("prices.fetch_job")
+    def _fetch_prices_job(self, job, items, force_refresh):
+        candidates = {}
+        forced = set()
+        sweep_pending = set(self.sweep.pending())
+        resuming = bool(sweep_pending) and not force_refresh
+        self.engine.sync_price_cache()
+        prices = self.prices.snapshot()
+        now = time.time()
+        for item in items:
+            item_name = item.get('name', '')
+            if not item_name or item_name.startswith('---') or item_name in candidates:
+                continue
+            
+            cached = prices.get(item_name)
+            if item_name in sweep_pending:
+                if self.sweep.is_refreshed(cached):
+                    self.sweep.complete(item_name)
+                    continue
+                forced.add(item_name)
+            elif not force_refresh and self.price_ttl.is_fresh(cached, now):
+                continue
+            
+            candidates[item_name] = self.price_ttl.urgency(cached, now)
         
-        n = len(filtered_prices)
-        if n == 0:
-            return None
+        # Most overdue first, so volatile items get the rate budget before stable ones
+        items_to_fetch = sorted(candidates, key=candidates.get, reverse=True)
         
-        if n % 2 == 0:
-            median = (filtered_prices[n // 2 - 1] + filtered_prices[n // 2]) / 2.0
-        else:
-            median = filtered_prices[n // 2]
+        if not items_to_fetch:
+            if self.sweep.active:
+                self.sweep.finish()
+            job.post(self._update_status_with_file_time)
+            return
         
-        best_price = None
-        min_distance = float('inf')
-        for price in filtered_prices:
-            distance = abs(price - median)
-            if distance < min_distance or (distance == min_distance and price < best_price):
-                min_distance = distance
-                best_price = price
+        total = len(items_to_fetch)
+        done_count = 0
+        priced_count = 0
         
-        return int(best_price) if best_price is not None else int(filtered_prices[0])
-    
-    def _try_fetch_price_with_slug(self, slug):
-        api_url = f"https://api.warframe.market/v2/orders/item/{slug}"
+        if resuming:
+            job.post(self.status_label.config, text=f"Resuming price sweep ({len(forced)} left)...")
+        else:
+            job.post(self.status_label.config, text=f"Fetching {total} prices...")
         
-        try:
-            req = urllib.request.Request(
-                api_url,
-                headers={
-                    'User-Agent': 'Ducanator/1.0',
-                    'Accept': 'application/json'
-                }
-            )
+        def on_result(item_name, price):
+            nonlocal done_count, priced_count
+            done_count += 1
+            if price is not None:
+                priced_count += 1
+            if item_name in forced and self.sweep.is_refreshed(self.prices.get(item_name)):
+                self.sweep.complete(item_name)
+            self._publish_price(item_name, price)
             
-            with urllib.request.urlopen(req, timeout=5) as response:
-                data = json.loads(response.read().decode('utf-8'))
-                
-                if data.get('error'):
-                    return None
-                
-                orders = data.get('data', [])
-                if isinstance(orders, dict):
-                    orders = orders.get('payload', {}).get('orders', [])
-                
-                if not isinstance(orders, list) or not orders:
-                    return None
-                
-                sell_orders = [
-                    order for order in orders
-                    if order.get('type') == 'sell' and order.get('visible', True)
-                ]
-                
-                if not sell_orders:
-                    return None
-                
-                prices = [order.get('platinum', 0) for order in sell_orders if order.get('platinum', 0) > 0]
-                if not prices:
-                    return None
-                
-                return self._calculate_reasonable_price(prices)
-                
-        except urllib.error.HTTPError as e:
-            if e.code == 404:
-                return None
-            return None
-        except Exception as e:
-            return None
-    
-    def fetch_market_price(self, item_name, force_refresh=False):
-        if not force_refresh:
-            if item_name in self.price_cache:
-                cached_price = self.price_cache[item_name]
-                if isinstance(cached_price, dict) and 'price' in cached_price:
-                    if time.time() - cached_price.get('timestamp', 0) < 3600:
-                        return cached_price['price']
-        
-        slug = self.item_name_to_slug(item_name)
-        if not slug:
-            return None
-        
-        price = self._try_fetch_price_with_slug(slug)
-        if price is not None:
-            self.price_cache[item_name] = {
-                'price': price,
-                'timestamp': time.time()
-            }
-            self.save_price_cache()
-            return price
+            if done_count % 20 == 0:
+                job.post(self.status_label.config, text=f"Fetching prices... {priced_count}/{total}")
         
-        variations = self.get_warframe_slug_variations(item_name)
-        for variation in variations[1:]:
-            price = self._try_fetch_price_with_slug(variation)
-            if price is not None:
-                self.price_cache[item_name] = {
-                    'price': price,
-                    'timestamp': time.time()
-                }
-                self.save_price_cache()
-                return price
-        
-        self.price_cache[item_name] = {
-            'price': None,
-            'timestamp': time.time()
-        }
-        return None
-    
-    def fetch_prices_for_items(self, items, force_refresh=False):
-        if self.price_fetch_in_progress:
+        try:
+            fetched_count = self.fetcher.fetch_many(items_to_fetch, forced, force_refresh, job, on_result)
+        finally:
+            self.save_price_cache()
+        if job.cancelled:
             return
         
-        def fetch_in_thread():
-            self.price_fetch_in_progress = True
-            try:
-                items_to_fetch = []
-                for item in items:
-                    item_name = item.get('name', '')
-                    if not item_name or item_name.startswith('---'):
-                        continue
-                    
-                    if not force_refresh:
-                        if item_name in self.price_cache:
-                            cached = self.price_cache[item_name]
-                            if isinstance(cached, dict) and 'price' in cached:
-                                if time.time() - cached.get('timestamp', 0) < 3600:
-                                    continue
-                    
-                    items_to_fetch.append(item_name)
-                
-                if not items_to_fetch:
-                    self.root.after(0, self._update_status_with_file_time)
-                    return
-                
-                total = len(items_to_fetch)
-                request_count = 0
-                start_time = time.time()
-                fetched_count = 0
-                
-                self.root.after(0, lambda: self.status_label.config(text=f"Fetching {total} prices..."))
-                
-                for idx, item_name in enumerate(items_to_fetch):
-                    current_time = time.time()
-                    elapsed = current_time - start_time
-                    
-                    if request_count >= 3 and elapsed < 1.0:
-                        wait_time = 1.0 - elapsed
-                        if wait_time > 0:
-                            time.sleep(wait_time)
-                        request_count = 0
-                        start_time = time.time()
-                    
-                    price = self.fetch_market_price(item_name, force_refresh=force_refresh)
-                    request_count += 1
-                    if price is not None:
-                        fetched_count += 1
-                    
-                    if (idx + 1) % 20 == 0:
-                        self.root.after(0, lambda c=fetched_count, t=idx+1, tot=total: 
-                                      self.status_label.config(text=f"Fetching prices... {c}/{tot}"))
-                    
-                    if (idx + 1) % 25 == 0 or idx == total - 1:
-                        self.root.after(0, self.refresh_display)
-                    
-                    time.sleep(1.0 / 3.0)
-                
-                self.save_price_cache()
-                if fetched_count > 0:
-                    self.root.after(0, lambda: self.status_label.config(text=f"Fetched {fetched_count} prices"))
-                self.root.after(0, self.refresh_display)
-                self.root.after(2000, self._update_status_with_file_time)
-            finally:
-                self.price_fetch_in_progress = False
-        
-        thread = threading.Thread(target=fetch_in_thread, daemon=True)
-        thread.start()
+        # Items that failed transiently stay pending for the next run; targets that are no
+        # longer in the inventory don't hold the sweep open
+        if self.sweep.active and not forced.difference(self.sweep.completed):
+            self.sweep.finish()
+        
+        if fetched_count > 0:
+            job.post(self.status_label.config, text=f"Fetched {fetched_count} prices")
+        job.post(self.root.after, 2000, self._update_status_with_file_time)
     
     def manual_fetch_all_prices(self):
-        if not self.inventory_data:
+        if not self.all_items:
             messagebox.showinfo("No Data", "No inventory data loaded. Please load inventory first.")
             return
         
         result = messagebox.askyesno(
             "Fetch All Prices",
-            f"This will fetch prices for {len(self.inventory_data)} items.\n\n"
+            f"This will fetch prices for {len(self.all_items)} items.\n\n"
             "This may take a while due to rate limiting (3 requests/second).\n\n"
             "Continue?"
         )
         
         if result:
-            self.fetch_prices_for_items(self.inventory_data, force_refresh=True)
+            self.fetch_prices_for_items(self.all_items, force_refresh=True)
     
-    def run_api_helper_threaded(self, callback):
+    def run_api_helper(self):
         base_dir = get_base_directory()
         cached_data_dir = os.path.join(base_dir, "cachedData")
         exe_path = os.path.join(cached_data_dir, "warframe-api-helper.exe")
         
         if not os.path.exists(exe_path):
             messagebox.showerror("Error", f"warframe-api-helper.exe not found!\n\nLooking for: {os.path.abspath(exe_path)}\n\nPlease make sure the executable is in the cachedData folder.")
-            callback(False)
+            self._on_api_helper_complete(False)
             return
         
         self.status_label.config(text="Running API helper...")
         self.root.update()
-        self.root.after(7000, lambda: self._auto_refresh_after_reload())
+        self.scheduler.submit(
+            "helper",
+            self._run_api_helper_job,
+            exe_path,
+            cached_data_dir,
+            supersedes=("helper", "load", "price_fetch")
+        )
+    
+    @timed("reload.helper")
+    def _run_api_helper_job(self, job, exe_path, cached_data_dir):
+        import subprocess
         
-        def run_in_thread():
-            try:
-                abs_exe_path = os.path.abspath(exe_path)
-                process = subprocess.Popen(
-                    [abs_exe_path],
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
-                    cwd=cached_data_dir,
-                    creationflags=subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0
-                )
-                
-                stdout, stderr = process.communicate()
-                
-                if process.returncode != 0:
-                    error_msg = stderr.decode('utf-8', errors='ignore') if stderr else "Unknown error"
-                    stdout_msg = stdout.decode('utf-8', errors='ignore') if stdout else ""
-                    full_error = f"{error_msg}\n\nSTDOUT:\n{stdout_msg}" if stdout_msg else error_msg
-                    self.root.after(0, lambda: messagebox.showerror("Error", f"Failed to run warframe-api-helper.exe:\n\n{full_error}"))
-                
-            except Exception as e:
-                import traceback
-                error_trace = traceback.format_exc()
-                self.root.after(0, lambda: messagebox.showerror("Error", f"Failed to run warframe-api-helper.exe:\n\n{str(e)}\n\n{error_trace}"))
+        try:
+            abs_exe_path = os.path.abspath(exe_path)
+            process = subprocess.Popen(
+                [abs_exe_path],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                cwd=cached_data_dir,
+                creationflags=subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0
+            )
+            
+            while True:
+                try:
+                    stdout, stderr = process.communicate(timeout=0.5)
+                    break
+                except subprocess.TimeoutExpired:
+                    if job.cancelled:
+                        process.kill()
+                        process.communicate()
+                        return
+            
+            if process.returncode != 0:
+                error_msg = stderr.decode('utf-8', errors='ignore') if stderr else "Unknown error"
+                stdout_msg = stdout.decode('utf-8', errors='ignore') if stdout else ""
+                full_error = f"{error_msg}\n\nSTDOUT:\n{stdout_msg}" if stdout_msg else error_msg
+                job.post(messagebox.showerror, "Error", f"Failed to run warframe-api-helper.exe:\n\n{full_error}")
+                job.post(self._on_api_helper_complete, False)
+                return
+            
+        except Exception as e:
+            error_trace = traceback.format_exc()
+            job.post(messagebox.showerror, "Error", f"Failed to run warframe-api-helper.exe:\n\n{str(e)}\n\n{error_trace}")
+            job.post(self._on_api_helper_complete, False)
+            return
         
-        thread = threading.Thread(target=run_in_thread, daemon=True)
-        thread.start()
+        job.post(self._on_api_helper_complete, True)
     
     def _auto_refresh_after_reload(self):
         self.status_label.config(text="Refreshing inventory...")
         self.root.update()
-        self._load_inventory_data_threaded()
+        self._start_inventory_load()
     
     def _update_status_with_file_time(self):
         inventory_path = os.path.join(self.cached_data_dir, "inventory.json")
@@ -412,269 +531,198 @@ class Ducanator:
     
     def load_inventory_from_json(self, run_api_helper_first=False):
         if run_api_helper_first:
-            self.run_api_helper_threaded(self._on_api_helper_complete)
+            self.run_api_helper()
             return
-        self._load_inventory_data_threaded()
+        self._start_inventory_load()
     
     def _on_api_helper_complete(self, success):
         if success:
-            self._load_inventory_data_threaded()
+            self._auto_refresh_after_reload()
         else:
             self.data_source = "API helper failed"
             self.status_label.config(text="API helper failed")
     
-    def _load_inventory_data_threaded(self):
-        def load_in_thread():
-            try:
-                self.root.after(0, lambda: self.status_label.config(text="Loading inventory..."))
-                
-                inventory_path = os.path.join(self.cached_data_dir, "inventory.json")
-                if not os.path.exists(inventory_path):
-                    self.root.after(0, lambda: messagebox.showerror("Error", "inventory.json not found!\n\nClick 'Reload JSON' to generate it from the API helper."))
-                    self.root.after(0, lambda: setattr(self, 'data_source', "inventory.json not found"))
-                    return
-                
-                with open(inventory_path, 'r', encoding='utf-8') as f:
-                    inventory_data = json.load(f)
-                
-                self.inventory_dict = {}
-                self._flatten_inventory(inventory_data)
-                
-                all_prime_items = []
-                loaded_files = []
-                item_category_map = {}
-                
-                for category, file_list in self.category_files.items():
-                    if category == "ALL":
-                        continue
-                    if not file_list:
-                        continue
-                    if not isinstance(file_list, list):
-                        file_list = [file_list]
-                    
-                    for filename in file_list:
-                        if filename and os.path.exists(filename):
-                            try:
-                                with open(filename, 'r', encoding='utf-8') as f:
-                                    category_data = json.load(f)
-                                
-                                prime_items = [item for item in category_data if item.get('isPrime', False)]
-                                
-                                for item in prime_items:
-                                    unique_name = item.get('uniqueName', '')
-                                    if unique_name:
-                                        item_category_map[unique_name] = category
-                                
-                                all_prime_items.extend(prime_items)
-                                loaded_files.append(filename)
-                            except Exception as e:
-                                print(f"Error loading {filename}: {e}")
-                
-                primary_fallback = os.path.join(self.cached_data_dir, "Primary.json")
-                if not loaded_files and os.path.exists(primary_fallback):
-                    with open(primary_fallback, 'r', encoding='utf-8') as f:
-                        primary_data = json.load(f)
-                    prime_items = [item for item in primary_data if item.get('isPrime', False)]
-                    all_prime_items.extend(prime_items)
-                    loaded_files.append(primary_fallback)
-                
-                if not loaded_files:
-                    self.root.after(0, lambda: messagebox.showerror("Error", "No category JSON files found!\n\nExpected files:\n- Primary.json\n- Secondary.json\n- Melee.json\n- Warframes.json\n- Companions.json\n- Archwing.json"))
-                    self.root.after(0, lambda: setattr(self, 'data_source', "No JSON files found"))
-                    return
-                
-                self.primary_items = all_prime_items
-                self.item_category_map = item_category_map
-                self.inventory_data = self.extract_prime_items(all_prime_items)
-                self.data_source = f"JSON Files ({len(self.inventory_data)} items from {len(loaded_files)} files)"
-                
-                self.root.after(0, self.refresh_display)
-                if self.inventory_data:
-                    self.root.after(1000, lambda: self.fetch_prices_for_items(self.inventory_data))
-                
-            except Exception as e:
-                self.root.after(0, lambda: messagebox.showerror("Error", f"Failed to load JSON files:\n{e}"))
-                self.root.after(0, lambda: setattr(self, 'data_source', f"Error: {str(e)}"))
-        
-        thread = threading.Thread(target=load_in_thread, daemon=True)
-        thread.start()
-    
-    def _flatten_inventory(self, data, prefix=""):
-        if isinstance(data, dict):
-            for key, value in data.items():
-                if key == "ItemType" and isinstance(value, str):
-                    item_count = data.get("ItemCount", 0)
-                    if item_count > 0:
-                        self.inventory_dict[value] = item_count
-                elif isinstance(value, (dict, list)):
-                    self._flatten_inventory(value, f"{prefix}.{key}")
-        elif isinstance(data, list):
-            for item in data:
-                if isinstance(item, (dict, list)):
-                    self._flatten_inventory(item, prefix)
-    
-    def extract_prime_items(self, items_list=None):
-        if items_list is None:
-            items_list = self.primary_items
-        
-        inventory_items = []
-        
-        valid_component_types = {
-            'Blueprint', 'Barrel', 'Receiver', 'Stock', 'Link', 
-            'Blade', 'Hilt', 'Handle', 'Grip', 'Lower Limb', 'Upper Limb',
-            'String', 'Chassis', 'Neuroptics', 'Systems', 'Harness',
-            'Cerebrum', 'Carapace', 'Wings', 'Head', 'Gauntlet',
-            'Boot', 'Blades', 'Disc', 'Ornament', 'Stars', 'Chain',
-            'Pouch', 'Band', 'Buckle', 'Prime Blueprint'
-        }
-        
-        resource_keywords = [
-            'Orokin Cell', 'Neurodes', 'Argon Crystal', 'Cryotic', 'Ferrite',
-            'Alloy Plate', 'Rubedo', 'Plastids', 'Nano Spores', 'Polymer Bundle',
-            'Circuits', 'Salvage', 'Nano Spores', 'Control Module', 'Morphics',
-            'Gallium', 'Neural Sensors', 'Oxium', 'Tellurium', 'Hexenon',
-            'Thrax Plasm', 'Entrati Lanthorn', 'Voidgel Orb', 'Tauforged Shard'
-        ]
-        
-        for prime_item in items_list:
-            prime_name = prime_item.get('name', '')
-            if not prime_name or 'Prime' not in prime_name:
-                continue
-            
-            if 'Galariak Prime' in prime_name or 'Sagek Prime' in prime_name:
-                continue
+    def _start_inventory_load(self):
+        # Fresh inventory makes any in-flight price fetch for the old data pointless
+        self.scheduler.submit("load", self._load_inventory_job, supersedes=("load", "price_fetch"))
+    
+    @timed("reload.load")
+    def _load_inventory_job(self, job):
+        try:
+            job.post(self.status_label.config, text="Loading inventory...")
             
-            # Get all components for this Prime item
-            components = prime_item.get('components', [])
+            sources = self.engine.view_sources(self.profiles)
+            if sources == self._view_sources:
+                job.post(self._on_inventory_unchanged)
+                return
             
-            for component in components:
-                component_unique_name = component.get('uniqueName', '')
-                component_name = component.get('name', '')
-                component_type = component.get('type', '')
-                
-                if not component_unique_name:
-                    continue
-                
-                if component_type == 'Resource':
-                    continue
-                
-                is_resource = any(keyword.lower() in component_name.lower() for keyword in resource_keywords)
-                if is_resource:
+            profiles = []
+            for profile in self.profiles:
+                if not os.path.exists(profile.inventory_path):
+                    if profile.name != MAIN_PROFILE:
+                        print(f"Skipping profile {profile.name}: {profile.inventory_path} not found")
                     continue
-                
-                component_name_lower = component_name.lower()
-                is_valid_component = False
-                
-                for valid_type in valid_component_types:
-                    valid_type_lower = valid_type.lower()
-                    if (component_name_lower == valid_type_lower or 
-                        component_name_lower.startswith(valid_type_lower + ' ') or
-                        component_name_lower.endswith(' ' + valid_type_lower) or
-                        ' ' + valid_type_lower + ' ' in ' ' + component_name_lower + ' '):
-                        is_valid_component = True
-                        break
-                
-                if not is_valid_component:
-                    has_ducats = component.get('ducats', 0) > 0
-                    has_prime_price = component.get('primeSellingPrice', 0) > 0
-                    is_tradable = component.get('tradable', False)
-                    if not (has_ducats or has_prime_price or is_tradable):
-                        continue
-                
-                item_count = self.inventory_dict.get(component_unique_name, 0)
-                
-                if item_count == 0:
-                    unique_name_parts = component_unique_name.split('/')
-                    item_name_part = unique_name_parts[-1] if unique_name_parts else ""
-                    
-                    if item_name_part:
-                        if "/Items/Warframes/" in component_unique_name or "/Types/Items/Warframes/" in component_unique_name:
-                            recipe_path = component_unique_name.replace("/Items/Warframes/", "/Recipes/WarframeRecipes/")
-                            recipe_path = recipe_path.replace("/Types/Items/Warframes/", "/Types/Recipes/WarframeRecipes/")
-                            if recipe_path.endswith("Component"):
-                                recipe_path = recipe_path.replace("Component", "Blueprint")
-                            elif not recipe_path.endswith("Blueprint"):
-                                recipe_path = recipe_path + "Blueprint"
-                            item_count = self.inventory_dict.get(recipe_path, 0)
-                        
-                        if item_count == 0:
-                            if item_name_part.endswith("Component"):
-                                blueprint_name = item_name_part.replace("Component", "Blueprint")
-                                recipe_path = f"/Lotus/Types/Recipes/WarframeRecipes/{blueprint_name}"
-                                item_count = self.inventory_dict.get(recipe_path, 0)
-                            else:
-                                if not item_name_part.endswith("Blueprint"):
-                                    recipe_path = f"/Lotus/Types/Recipes/WarframeRecipes/{item_name_part}Blueprint"
-                                    item_count = self.inventory_dict.get(recipe_path, 0)
-                                else:
-                                    recipe_path = f"/Lotus/Types/Recipes/WarframeRecipes/{item_name_part}"
-                                    item_count = self.inventory_dict.get(recipe_path, 0)
-                        
-                        if item_count == 0:
-                            weapon_recipe_path = f"/Lotus/Types/Recipes/Weapons/{item_name_part}Blueprint"
-                            item_count = self.inventory_dict.get(weapon_recipe_path, 0)
-                            if item_count == 0:
-                                weapon_recipe_path = f"/Lotus/Types/Recipes/Weapons/{item_name_part}"
-                                item_count = self.inventory_dict.get(weapon_recipe_path, 0)
-                        
-                        if item_count == 0:
-                            base_name = item_name_part
-                            if base_name.endswith("Component"):
-                                base_name = base_name.replace("Component", "")
-                            elif base_name.endswith("Blueprint"):
-                                base_name = base_name.replace("Blueprint", "")
-                            
-                            search_names = [base_name]
-                            if "Helmet" in base_name:
-                                neuroptics_name = base_name.replace("Helmet", "Neuroptics")
-                                search_names.append(neuroptics_name)
-                            
-                            for inv_path, inv_count in self.inventory_dict.items():
-                                if "/Recipes/" in inv_path:
-                                    for search_name in search_names:
-                                        if search_name in inv_path:
-                                            if (inv_path.endswith(search_name + "Blueprint") or
-                                                f"/{search_name}Blueprint" in inv_path):
-                                                item_count = inv_count
-                                                break
-                                    if item_count > 0:
-                                        break
-                
-                if item_count > 0:
-                    full_item_name = f"{prime_name} {component_name}"
-                    ducats = component.get('ducats', 0)
-                    
-                    prime_unique_name = prime_item.get('uniqueName', '')
-                    category = getattr(self, 'item_category_map', {}).get(prime_unique_name, 'Unknown')
-                    
-                    if category == 'Unknown':
-                        category = prime_item.get('category', 'Unknown')
-                    
-                    if category == 'Unknown':
-                        slot = prime_item.get('slot', -1)
-                        slot_to_category = {
-                            0: 'Warframes',
-                            1: 'Primary',
-                            2: 'Secondary',
-                            3: 'Melee',
-                            4: 'Companions',
-                            5: 'Archwing'
-                        }
-                        category = slot_to_category.get(slot, 'Unknown')
-                    
-                    inventory_items.append({
-                        "name": full_item_name,
-                        "amount": item_count,
-                        "owned": False,
-                        "cost": ducats,
-                        "rarity": "Unknown",
-                        "base_name": prime_name,
-                        "component_type": component_name,
-                        "category": category
-                    })
-        
-        inventory_items.sort(key=lambda x: (x["base_name"], x["component_type"]))
-        return inventory_items
+                try:
+                    profiles.append((profile, load_inventory(profile.inventory_path)))
+                except Exception as e:
+                    if profile.name == MAIN_PROFILE:
+                        raise
+                    print(f"Error loading profile {profile.name}: {e}")
+            
+            if not profiles:
+                job.post(messagebox.showerror, "Error", "inventory.json not found!\n\nClick 'Reload JSON' to generate it from the API helper.")
+                job.post(setattr, self, 'data_source', "inventory.json not found")
+                return
+            
+            catalog = self.engine.load_catalog(should_stop=lambda: job.cancelled)
+            if catalog is None:
+                return
+            loaded_files = catalog.loaded_files
+            
+            if not loaded_files:
+                job.post(messagebox.showerror, "Error", "No category JSON files found!\n\nExpected files:\n- Primary.json\n- Secondary.json\n- Melee.json\n- Warframes.json\n- Companions.json\n- Archwing.json")
+                job.post(setattr, self, 'data_source', "No JSON files found")
+                return
+            
+            if job.cancelled:
+                return
+            
+            # Every profile resolves against the same catalog index. Nothing the UI reads is touched
+            # here; the results are applied in one go on the UI thread
+            loaded = []
+            parts_by_profile = {}
+            for profile, inventory_dict in profiles:
+                items = self.engine.resolve_parts(inventory_dict)
+                loaded.append((profile, items, MarkIndex.membership(items)))
+                parts_by_profile[profile.name] = items
+            all_items = merge_parts(parts_by_profile)
+            
+            profile_note = f", {len(loaded)} profiles" if len(loaded) > 1 else ""
+            data_source = f"JSON Files ({len(all_items)} items from {len(loaded_files)} files{profile_note})"
+            self.view_snapshot.save(sources, parts_by_profile)
+            
+            job.post(self._apply_loaded_profiles, loaded, all_items, MarkIndex.membership(all_items), data_source, sources)
+            if all_items:
+                # Prices are shared, so the union of all profiles is fetched once
+                job.post(self.fetch_prices_for_items, all_items)
+            
+        except Exception as e:
+            job.post(messagebox.showerror, "Error", f"Failed to load JSON files:\n{e}")
+            job.post(setattr, self, 'data_source', f"Error: {str(e)}")
+    
+    def _on_inventory_unchanged(self):
+        self._update_status_with_file_time()
+        if self.all_items:
+            self.fetch_prices_for_items(self.all_items)
+    
+    def _apply_loaded_profiles(self, loaded, all_items, membership, data_source, sources):
+        for profile, items, profile_membership in loaded:
+            profile.items = items
+            profile.marks.set_membership(profile_membership)
+        self._set_profile_parts([profile for profile, _, _ in loaded], all_items, membership)
+        self.data_source = data_source
+        self._view_sources = sources
+        self._on_inventory_loaded()
+    
+    def _set_profile_parts(self, profiles, all_items, membership):
+        self.loaded_profiles = profiles
+        self.all_items = all_items
+        self.combined_marks = CombinedMarks(self.loaded_profiles)
+        self.combined_marks.set_membership(membership)
+        if self.active_profile != self.ALL_PROFILES and self._profile(self.active_profile) not in self.loaded_profiles:
+            self.active_profile = self.loaded_profiles[0].name
+        self._apply_profile()
+    
+    @timed("startup.snapshot")
+    def _restore_view_snapshot(self):
+        snapshot = self.view_snapshot.load()
+        if snapshot is None:
+            return False
+        
+        profiles = []
+        parts_by_profile = {}
+        for profile in self.profiles:
+            items = snapshot['profiles'].get(profile.name)
+            if not isinstance(items, list):
+                continue
+            profile.items = items
+            profile.marks.set_items(items)
+            profiles.append(profile)
+            parts_by_profile[profile.name] = items
+        if not profiles:
+            return False
+        
+        all_items = merge_parts(parts_by_profile)
+        self._set_profile_parts(profiles, all_items, MarkIndex.membership(all_items))
+        self._view_sources = snapshot['sources']
+        self.data_source = f"Snapshot ({len(self.all_items)} items)"
+        self._on_inventory_loaded()
+        return True
+    
+    def _apply_profile(self):
+        if self.active_profile == self.ALL_PROFILES:
+            self.marks = self.combined_marks
+            self.inventory_data = self.all_items
+            return
+        profile = self._profile(self.active_profile)
+        self.marks = profile.marks
+        self.inventory_data = profile.items
+    
+    def select_profile(self, event=None):
+        name = self.profile_var.get()
+        if name == self.active_profile or (name != self.ALL_PROFILES and self._profile(name) not in self.loaded_profiles):
+            return
+        self.active_profile = name
+        self._apply_profile()
+        self._on_inventory_loaded()
+    
+    def _load_icons(self):
+        icon_path = os.path.join(self.cached_data_dir, "Ducat.png")
+        if not os.path.exists(icon_path):
+            icon_path = os.path.join(self.cached_data_dir, "ducat.png")
+        if not os.path.exists(icon_path):
+            return
+        
+        try:
+            from PIL import Image, ImageTk
+        except ImportError:
+            return
+        
+        try:
+            pil_image = Image.open(icon_path)
+            icon_image = ImageTk.PhotoImage(pil_image)
+            self.root.iconphoto(True, icon_image)
+            small_pil = pil_image.resize((pil_image.width // 5, pil_image.height // 5), Image.Resampling.LANCZOS)
+            self.ducat_icon_small = ImageTk.PhotoImage(small_pil)
+            icon_label = tk.Label(
+                self.title_frame,
+                image=self.ducat_icon_small,
+                bg="#1a1a2e"
+            )
+            icon_label.pack(side=tk.LEFT, padx=(0, 8), before=self.title_label)
+            icon_label.image = self.ducat_icon_small
+        except Exception as e:
+            print(f"Failed to load icon: {e}")
+    
+    def _update_profile_selector(self):
+        names = [profile.name for profile in self.loaded_profiles]
+        if len(names) < 2:
+            if self.profile_selector is not None:
+                self.profile_selector.pack_forget()
+            return
+        if self.profile_selector is None:
+            # Most people have one account, so the selector is only built once it's needed
+            self.profile_selector = ttk.Combobox(
+                self.title_frame,
+                textvariable=self.profile_var,
+                state="readonly",
+                width=16,
+                font=("Segoe UI", 10)
+            )
+            self.profile_selector.bind("<<ComboboxSelected>>", self.select_profile)
+        self.profile_selector.config(values=names + [self.ALL_PROFILES])
+        self.profile_var.set(self.active_profile)
+        self.profile_selector.pack(side=tk.LEFT, padx=(15, 0))
     
     def setup_ui(self):
         main_container = tk.Frame(self.root, bg="#0f0f0f")
@@ -686,26 +734,7 @@ class Ducanator:
         title_frame = tk.Frame(top_bar, bg="#1a1a2e")
         title_frame.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=15, pady=12)
         
-        icon_path = os.path.join(self.cached_data_dir, "Ducat.png")
-        if not os.path.exists(icon_path):
-            icon_path = os.path.join(self.cached_data_dir, "ducat.png")
-        
-        if os.path.exists(icon_path) and PIL_AVAILABLE:
-            try:
-                pil_image = Image.open(icon_path)
-                icon_image = ImageTk.PhotoImage(pil_image)
-                self.root.iconphoto(True, icon_image)
-                small_pil = pil_image.resize((pil_image.width // 5, pil_image.height // 5), Image.Resampling.LANCZOS)
-                self.ducat_icon_small = ImageTk.PhotoImage(small_pil)
-                icon_label = tk.Label(
-                    title_frame,
-                    image=self.ducat_icon_small,
-                    bg="#1a1a2e"
-                )
-                icon_label.pack(side=tk.LEFT, padx=(0, 8))
-                icon_label.image = self.ducat_icon_small
-            except Exception as e:
-                print(f"Failed to load icon: {e}")
+        self.title_frame = title_frame
         
         title_label = tk.Label(
             title_frame, 
@@ -715,6 +744,10 @@ class Ducanator:
             fg="#ffffff"
         )
         title_label.pack(side=tk.LEFT)
+        self.title_label = title_label
+        
+        self.profile_var = tk.StringVar(value=self.active_profile)
+        self.profile_selector = None
         
         stats_frame = tk.Frame(top_bar, bg="#1a1a2e")
         stats_frame.pack(side=tk.RIGHT, padx=15, pady=12)
@@ -761,6 +794,8 @@ class Ducanator:
         
         control_panel = tk.Frame(main_container, bg="#16213e", relief=tk.FLAT)
         control_panel.pack(fill=tk.X, padx=0, pady=0)
+        self.main_container = main_container
+        self.control_panel = control_panel
         
         data_section = tk.LabelFrame(
             control_panel,
@@ -806,6 +841,23 @@ class Ducanator:
         )
         refresh_display_btn.pack(side=tk.LEFT, padx=5)
         
+        group_sets_btn = tk.Button(
+            data_section,
+            text="🗂 Group Sets",
+            command=self.toggle_group_sets,
+            bg="#5a5a6a",
+            fg="white",
+            font=("Segoe UI", 9),
+            padx=12,
+            pady=6,
+            relief=tk.FLAT,
+            cursor="hand2",
+            activebackground="#4a4a5a",
+            activeforeground="white"
+        )
+        group_sets_btn.pack(side=tk.LEFT, padx=5)
+        self.group_sets_btn = group_sets_btn
+        
         fetch_prices_btn = tk.Button(
             data_section,
             text="💰 Fetch Prices",
@@ -822,6 +874,22 @@ class Ducanator:
         )
         fetch_prices_btn.pack(side=tk.LEFT, padx=5)
         
+        metrics_btn = tk.Button(
+            data_section,
+            text="📈 Perf",
+            command=self.toggle_metrics_panel,
+            bg="#5a5a6a",
+            fg="white",
+            font=("Segoe UI", 9),
+            padx=12,
+            pady=6,
+            relief=tk.FLAT,
+            cursor="hand2",
+            activebackground="#4a4a5a",
+            activeforeground="white"
+        )
+        metrics_btn.pack(side=tk.LEFT, padx=5)
+        
         marking_section = tk.LabelFrame(
             control_panel,
             text=" Item Marking ",
@@ -1039,6 +1107,7 @@ class Ducanator:
         self.tree.column("Ducats", width=80, anchor=tk.CENTER, minwidth=70, stretch=False)
         self.tree.column("Platinum", width=90, anchor=tk.CENTER, minwidth=80, stretch=False)
         self.tree.column("Status", width=100, anchor=tk.CENTER, minwidth=90, stretch=False)
+        self.tree.column("#0", width=28, minwidth=28, stretch=False)
         
         style = ttk.Style()
         style.theme_use("clam")
@@ -1093,65 +1162,16 @@ class Ducanator:
                  arrowcolor=[("active", "#5aafff"), ("!disabled", "#4a9eff")],
                  bordercolor=[("focus", "#3a4451"), ("!focus", "#3a4451")])
         
-        def style_combobox_popup():
-            def _find_and_style_listbox():
-                try:
-                    def get_all_children(parent):
-                        children = []
-                        try:
-                            for child in parent.winfo_children():
-                                children.append(child)
-                                children.extend(get_all_children(child))
-                        except:
-                            pass
-                        return children
-                    
-                    all_widgets = [self.root] + get_all_children(self.root)
-                    
-                    try:
-                        all_widgets.extend([w for w in self.root.tk.eval('winfo children .').split() if w])
-                    except:
-                        pass
-                    
-                    for widget in all_widgets:
-                        try:
-                            if isinstance(widget, tk.Listbox):
-                                widget.configure(
-                                    bg="#2a3441",
-                                    fg="#ffffff",
-                                    selectbackground="#4a9eff",
-                                    selectforeground="white",
-                                    activestyle="none",
-                                    relief=tk.FLAT,
-                                    borderwidth=0,
-                                    highlightthickness=0,
-                                    font=("Segoe UI", 10)
-                                )
-                            elif isinstance(widget, tk.Toplevel):
-                                try:
-                                    widget.configure(bg="#2a3441")
-                                except:
-                                    pass
-                                for child in get_all_children(widget):
-                                    if isinstance(child, tk.Listbox):
-                                        child.configure(
-                                            bg="#2a3441",
-                                            fg="#ffffff",
-                                            selectbackground="#4a9eff",
-                                            selectforeground="white",
-                                            activestyle="none",
-                                            relief=tk.FLAT,
-                                            borderwidth=0,
-                                            highlightthickness=0,
-                                            font=("Segoe UI", 10)
-                                        )
-                        except:
-                            continue
-                except Exception:
-                    pass
-            
-            for delay in [5, 15, 30, 50, 100, 200]:
-                self.root.after(delay, _find_and_style_listbox)
+        # The combobox popdown is a plain Listbox created on demand, so style it through
+        # the option database instead of hunting for it after it appears
+        self.root.option_add("*TCombobox*Listbox.background", "#2a3441")
+        self.root.option_add("*TCombobox*Listbox.foreground", "#ffffff")
+        self.root.option_add("*TCombobox*Listbox.selectBackground", "#4a9eff")
+        self.root.option_add("*TCombobox*Listbox.selectForeground", "white")
+        self.root.option_add("*TCombobox*Listbox.relief", "flat")
+        self.root.option_add("*TCombobox*Listbox.borderWidth", 0)
+        self.root.option_add("*TCombobox*Listbox.highlightThickness", 0)
+        self.root.option_add("*TCombobox*Listbox.font", ("Segoe UI", 10))
         
         v_scrollbar.configure(style="Vertical.TScrollbar")
         
@@ -1159,6 +1179,8 @@ class Ducanator:
         
         self.tree.bind("<Button-3>", self.on_item_click)
         self.tree.bind("<Double-Button-3>", self.on_item_click)
+        self.tree.bind("<<TreeviewOpen>>", self.on_set_open)
+        self.tree.bind("<<TreeviewClose>>", self.on_set_close)
         
         def on_platinum_header_click(event):
             region = self.tree.identify_region(event.x, event.y)
@@ -1182,97 +1204,16 @@ class Ducanator:
     
     def on_platinum_filter_change(self, event=None):
         selected_value = self.platinum_entry.get().strip()
-        old_filter = self.platinum_filter
         self.platinum_filter = selected_value if selected_value else ""
         
         try:
             filter_platinum = int(self.platinum_filter) if self.platinum_filter else None
-            
-            if not filter_platinum:
-                for item_name in list(self.platinum_filter_marked):
-                    if item_name in self.marked_items and not self._is_manually_marked(item_name):
-                        self.marked_items.remove(item_name)
-                self.platinum_filter_marked.clear()
-                self.save_marked_items()
-                self.refresh_display()
-                return
-            
-            previously_filter_marked = self.platinum_filter_marked.copy()
-            
-            manually_marked_items = set()
-            for item in self.inventory_data:
-                item_name = item.get("name", "")
-                if not item_name or item_name.startswith('---'):
-                    continue
-                
-                base_name = item.get("base_name", "")
-                if base_name:
-                    base_marker = f"BASE:{base_name}"
-                    if base_marker in self.marked_items:
-                        manually_marked_items.add(item_name)
-                        continue
-                
-                if item_name in self.marked_items and item_name not in previously_filter_marked:
-                    manually_marked_items.add(item_name)
-            
-            self.platinum_filter_marked.clear()
-            
-            for item in self.inventory_data:
-                item_name = item.get("name", "")
-                if not item_name or item_name.startswith('---'):
-                    continue
-                
-                if item_name in manually_marked_items:
-                    continue
-                
-                platinum_price = None
-                if item_name in self.price_cache:
-                    cached = self.price_cache[item_name]
-                    if isinstance(cached, dict) and cached.get('price') is not None:
-                        platinum_price = cached.get('price')
-                    elif isinstance(cached, (int, float)):
-                        platinum_price = cached
-                elif isinstance(self.price_cache.get(item_name), (int, float)):
-                    platinum_price = self.price_cache[item_name]
-                
-                if platinum_price is None:
-                    continue
-                
-                should_be_marked = platinum_price >= filter_platinum
-                is_currently_marked = item_name in self.marked_items
-                
-                if should_be_marked:
-                    if not is_currently_marked:
-                        self.marked_items.add(item_name)
-                        self.platinum_filter_marked.add(item_name)
-                    elif item_name in previously_filter_marked:
-                        self.platinum_filter_marked.add(item_name)
-                else:
-                    if is_currently_marked and item_name in previously_filter_marked:
-                        self.marked_items.remove(item_name)
-            
-            if previously_filter_marked != self.platinum_filter_marked:
-                self.save_marked_items()
-            
+            added, removed = self.price_filter.set_threshold(filter_platinum or None)
+            self._sync_marks(added | removed)
         except ValueError:
             pass
         
         self.refresh_display()
-    
-    def _is_manually_marked(self, item_name):
-        for inv_item in self.inventory_data:
-            if inv_item.get("name") == item_name:
-                base_name = inv_item.get("base_name", "")
-                if base_name:
-                    base_marker = f"BASE:{base_name}"
-                    if base_marker in self.marked_items:
-                        return True
-                break
-        
-        if item_name in self.marked_items and item_name not in self.platinum_filter_marked:
-            return True
-        
-        return False
 
     def toggle_amount_sort(self):
         self.amount_sort_state = (self.amount_sort_state + 1) % 3
@@ -1318,35 +1259,143 @@ class Ducanator:
         self.amount_sort_state = 0
         self.tree.heading("Platinum", text="Platinum")
         
-        had_filter_marked = len(self.platinum_filter_marked) > 0
-        for item_name in list(self.platinum_filter_marked):
-            if item_name in self.marked_items and not self._is_manually_marked(item_name):
-                self.marked_items.remove(item_name)
-        self.platinum_filter_marked.clear()
-        if had_filter_marked:
-            self.save_marked_items()
+        added, removed = self.price_filter.set_threshold(None)
+        self._sync_marks(added | removed)
         
         self.select_category("ALL")
         self.refresh_display()
     
-    def calculate_full_trades(self, items):
-        total_items = 0
-        
-        for item in items:
-            item_id = item["name"]
-            base_name = item.get("base_name", "")
-            if self.is_item_marked(item_id, base_name):
-                continue
-            
-            total_items += item.get("amount", 0)
+    def calculate_full_trades(self):
+        category = self.selected_category if self.selected_category != "ALL" else None
+        ducats = None
+        if self.ducat_filter:
+            try:
+                ducats = int(self.ducat_filter)
+            except ValueError:
+                pass
         
+        self.trade_counter.set_search(self.search_text)
+        total_items = self.trade_counter.total(category, ducats)
         full_trades = total_items // 6
         return full_trades, total_items
     
-    def update_full_trade_counter(self, filtered_items):
-        full_trades, total_items = self.calculate_full_trades(filtered_items)
+    def update_full_trade_counter(self):
+        full_trades, total_items = self.calculate_full_trades()
         self.full_trade_label.config(text=f"{full_trades} ({total_items} items)")
     
+    def toggle_group_sets(self):
+        self.group_sets = not self.group_sets
+        if self.group_sets:
+            self.group_sets_btn.config(text="🗂 Flat List")
+            self.tree.configure(show="tree headings")
+        else:
+            self.group_sets_btn.config(text="🗂 Group Sets")
+            self.tree.configure(show="headings")
+        self.refresh_display()
+    
+    def _build_metrics_panel(self):
+        panel = tk.Frame(self.main_container, bg="#0f1419", relief=tk.FLAT)
+        
+        button_row = tk.Frame(panel, bg="#0f1419")
+        button_row.pack(fill=tk.X, padx=15, pady=(8, 0))
+        
+        tk.Label(
+            button_row,
+            text="📈 Performance",
+            font=("Segoe UI", 9, "bold"),
+            bg="#0f1419",
+            fg="#ffffff"
+        ).pack(side=tk.LEFT)
+        
+        for text, command in (("Export JSON", self.export_metrics), ("Reset", self.reset_metrics), ("Memory", self.take_memory_report)):
+            tk.Button(
+                button_row,
+                text=text,
+                command=command,
+                bg="#5a5a6a",
+                fg="white",
+                font=("Segoe UI", 8),
+                padx=8,
+                pady=2,
+                relief=tk.FLAT,
+                cursor="hand2",
+                activebackground="#4a4a5a",
+                activeforeground="white"
+            ).pack(side=tk.RIGHT, padx=(5, 0))
+        
+        self.metrics_text = tk.Text(
+            panel,
+            height=14,
+            bg="#1a2332",
+            fg="#d0d0d0",
+            font=("Consolas", 9),
+            relief=tk.FLAT,
+            bd=0,
+            wrap=tk.NONE
+        )
+        self.metrics_text.pack(fill=tk.X, padx=15, pady=8)
+        return panel
+    
+    def toggle_metrics_panel(self):
+        if self.metrics_panel is None:
+            self.metrics_panel = self._build_metrics_panel()
+        
+        if self._metrics_after is not None:
+            self.root.after_cancel(self._metrics_after)
+            self._metrics_after = None
+            self.metrics_panel.pack_forget()
+            return
+        
+        # Collection stays on once the panel has been opened, so closing it doesn't lose history
+        metrics.enabled = True
+        self.metrics_panel.pack(fill=tk.X, after=self.control_panel)
+        self._update_metrics_panel()
+    
+    def _update_metrics_panel(self):
+        self.metrics_text.config(state=tk.NORMAL)
+        self.metrics_text.delete("1.0", tk.END)
+        self.metrics_text.insert(tk.END, metrics.report())
+        if self._memory_text:
+            self.metrics_text.insert(tk.END, "\n\n" + self._memory_text)
+        self.metrics_text.config(state=tk.DISABLED)
+        self._metrics_after = self.root.after(self.METRICS_INTERVAL, self._update_metrics_panel)
+    
+    def export_metrics(self):
+        from tkinter import filedialog
+        
+        path = filedialog.asksaveasfilename(
+            title="Export performance data",
+            defaultextension=".json",
+            initialfile="ducanator_metrics.json",
+            filetypes=[("JSON files", "*.json")]
+        )
+        if not path:
+            return
+        try:
+            data = metrics.to_json()
+            if memory.tracing:
+                data["memory"] = memory.take()
+            write_json_atomic(path, data, indent=2)
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to export performance data:\n{e}")
+    
+    def take_memory_report(self):
+        if not memory.tracing:
+            # Only allocations made from now on are seen, so reload to count the catalog and inventory
+            memory.start()
+            self._memory_text = "Memory tracing started - reload the inventory, then click Memory again"
+        else:
+            self._memory_text = memory.report(memory.take())
+        if self._metrics_after is not None:
+            self.root.after_cancel(self._metrics_after)
+            self._update_metrics_panel()
+    
+    def reset_metrics(self):
+        metrics.reset()
+        if self._metrics_after is not None:
+            self.root.after_cancel(self._metrics_after)
+            self._update_metrics_panel()
+    
     def toggle_marked_items(self):
         self.show_marked = not self.show_marked
         if self.show_marked:
@@ -1355,16 +1404,27 @@ class Ducanator:
             self.toggle_marked_btn.config(text="Show Marked")
         self.refresh_display()
     
+    @timed("ui.render")
     def refresh_display(self):
         primary_path = os.path.join(self.cached_data_dir, "Primary.json")
         inventory_path = os.path.join(self.cached_data_dir, "inventory.json")
-        if not self.inventory_data and os.path.exists(primary_path) and os.path.exists(inventory_path):
+        if (not self.inventory_data and not self.scheduler.is_running("load")
+                and os.path.exists(primary_path) and os.path.exists(inventory_path)):
             self.load_inventory_from_json()
         
         self._update_status_with_file_time()
+        self._last_refresh = time.monotonic()
+        
+        selected_keys = {self._row_keys.get(row_id) for row_id in self.tree.selection()}
+        scroll_position = self.tree.yview()[0]
         
         for item in self.tree.get_children():
             self.tree.delete(item)
+        self._row_keys = {}
+        self._rows_by_item = {}
+        self._set_rows = {}
+        self._set_items = {}
+        self._pending_children = {}
         
         if not self.inventory_data:
             self.tree.insert("", tk.END, values=(
@@ -1376,122 +1436,151 @@ class Ducanator:
             ))
             return
         
-        filtered_items = []
-        for item in self.inventory_data:
-            item_id = item["name"]
-            base_name = item.get("base_name", "")
-            is_marked = self.is_item_marked(item_id, base_name)
-            
-            if self.selected_category != "ALL":
-                item_category = item.get("category", "Unknown")
-                if item_category != self.selected_category:
-                    continue
-            
-            if not self.show_marked and is_marked:
-                continue
-            
-            if self.search_text:
-                if self.search_text not in item_id.lower():
-                    continue
-            
-            if self.ducat_filter:
-                try:
-                    filter_ducats = int(self.ducat_filter)
-                    item_ducats = item.get("cost", 0)
-                    if item_ducats != filter_ducats:
-                        continue
-                except ValueError:
-                    pass
-            
-            filtered_items.append(item)
-
-        if self.amount_sort_state != 0:
-            def get_amount(item):
-                return item.get("amount", 0)
-
-            if self.amount_sort_state == 1:
-                filtered_items.sort(key=get_amount)
-            else:
-                filtered_items.sort(key=get_amount, reverse=True)
-
-        
-        if self.platinum_sort_state != 0:
-            def get_platinum_price(item):
-                item_name = item.get("name", "")
-                if item_name in self.price_cache:
-                    cached = self.price_cache[item_name]
-                    if isinstance(cached, dict) and cached.get('price') is not None:
-                        return cached.get('price', 0)
-                    elif isinstance(cached, (int, float)):
-                        return cached
-                elif isinstance(self.price_cache.get(item_name), (int, float)):
-                    return self.price_cache[item_name]
-                return 0
-            
-            if self.platinum_sort_state == 1:
-                filtered_items.sort(key=get_platinum_price)
-            else:
-                filtered_items.sort(key=get_platinum_price, reverse=True)
+        prices = self.prices.snapshot()
+        filtered_items = filter_view_items(
+            self.inventory_data,
+            prices,
+            self.is_item_marked,
+            category=self.selected_category,
+            show_marked=self.show_marked,
+            search_text=self.search_text,
+            ducat_filter=self.ducat_filter,
+            amount_sort=self.amount_sort_state,
+            platinum_sort=self.platinum_sort_state
+        )
         
-        current_base = None
-        for item in filtered_items:
-            item_id = item["name"]
-            base_name = item.get("base_name", "")
-            is_marked = self.is_item_marked(item_id, base_name)
-            status = "✗ MARKED" if is_marked else ""
-            
-            if base_name and base_name != current_base:
-                current_base = base_name
-                base_marker = f"BASE:{base_name}"
-                base_is_marked = base_marker in self.marked_items
-                separator_status = "✗ MARKED" if base_is_marked else ""
-                separator_tags = ("separator", "marked") if base_is_marked else ("separator",)
-                self.tree.insert("", tk.END, 
-                               values=(f"--- {base_name} ---", "", "", "", separator_status),
-                               tags=separator_tags)
-            
-            tags = ("marked",) if is_marked else ("normal",)
-            
-            ducats = item.get("cost", 0)
-            display_value = str(ducats) if ducats > 0 else ""
-            
-            item_name = item["name"]
-            platinum_price = ""
-            if item_name in self.price_cache:
-                cached = self.price_cache[item_name]
-                if isinstance(cached, dict) and cached.get('price') is not None:
-                    platinum_price = str(cached['price'])
-                elif isinstance(cached, (int, float)):
-                    platinum_price = str(cached)
-            elif isinstance(self.price_cache.get(item_name), (int, float)):
-                platinum_price = str(self.price_cache[item_name])
-            
-            self.tree.insert("", tk.END, 
-                           values=(
-                               item["name"],
-                               f"{item['amount']}",
-                               display_value,
-                               platinum_price,
-                               status
-                           ),
-                           tags=tags)
+        if self.group_sets:
+            self._render_grouped(filtered_items, prices)
+        else:
+            self._render_flat(filtered_items, prices)
         
         self.tree.tag_configure("marked", background="#2a1f1f", foreground="#ff6b6b")
         self.tree.tag_configure("normal", background="#1e2749", foreground="#ffffff")
         self.tree.tag_configure("separator", background="#16213e", foreground="#4a9eff", font=("Segoe UI", 9, "bold"))
         
-        self.update_full_trade_counter(filtered_items)
+        for row_id, row_key in self._row_keys.items():
+            if row_key in selected_keys:
+                self.tree.selection_set(row_id)
+                break
+        self.tree.yview_moveto(scroll_position)
+        
+        self.update_full_trade_counter()
     
-    def is_item_marked(self, item_name, base_name=None):
-        if item_name in self.marked_items:
-            return True
+    def _insert_item_row(self, parent, item, prices=None):
+        item_id = item["name"]
+        is_marked = self.is_item_marked(item_id, item.get("base_name", ""))
+        values, tags = item_row(item, self._get_cached_price(item_id, prices), is_marked)
+        row_id = self.tree.insert(parent, tk.END, values=values, tags=tags)
+        self._row_keys[row_id] = ("item", item_id)
+        self._rows_by_item.setdefault(item_id, []).append(row_id)
+        return row_id
+    
+    def _render_flat(self, filtered_items, prices):
+        for row_type, key, values, tags in flat_view_rows(filtered_items, prices, self.is_item_marked, self.marks.is_set_marked):
+            row_id = self.tree.insert("", tk.END, values=values, tags=tags)
+            self._row_keys[row_id] = (row_type, key)
+            if row_type == "item":
+                self._rows_by_item.setdefault(key, []).append(row_id)
+    
+    def _set_totals(self, items, prices=None):
+        quantity = 0
+        ducats = 0
+        platinum = None
+        for item in items:
+            amount = item.get("amount", 0)
+            quantity += amount
+            ducats += item.get("cost", 0) * amount
+            price = self._get_cached_price(item["name"], prices)
+            if price is not None:
+                platinum = (platinum or 0) + price * amount
+        return quantity, ducats, platinum
+    
+    def _set_row_values(self, base_name, items, prices=None):
+        quantity, ducats, platinum = self._set_totals(items, prices)
+        base_is_marked = self.marks.is_set_marked(base_name)
+        marked_count = sum(1 for item in items if self.is_item_marked(item["name"], base_name))
+        
+        if base_is_marked or marked_count == len(items):
+            status = "✗ MARKED"
+        elif marked_count:
+            status = f"{marked_count}/{len(items)} marked"
+        else:
+            status = ""
+        
+        values = (
+            base_name,
+            f"{quantity}",
+            str(ducats) if ducats > 0 else "",
+            str(platinum) if platinum is not None else "",
+            status
+        )
+        tags = ("separator", "marked") if base_is_marked else ("separator",)
+        return values, tags
+    
+    def _render_grouped(self, filtered_items, prices):
+        groups = {}
+        for item in filtered_items:
+            groups.setdefault(item.get("base_name", ""), []).append(item)
+        ordered_groups = list(groups.items())
         
-        if base_name:
-            base_marker = f"BASE:{base_name}"
-            if base_marker in self.marked_items:
-                return True
+        if self.amount_sort_state != 0:
+            ordered_groups.sort(key=lambda group: self._set_totals(group[1], prices)[0],
+                                reverse=self.amount_sort_state == 2)
+        
+        if self.platinum_sort_state != 0:
+            ordered_groups.sort(key=lambda group: self._set_totals(group[1], prices)[2] or 0,
+                                reverse=self.platinum_sort_state == 2)
+        
+        for base_name, items in ordered_groups:
+            if not base_name:
+                for item in items:
+                    self._insert_item_row("", item, prices)
+                continue
+            
+            values, tags = self._set_row_values(base_name, items, prices)
+            row_id = self.tree.insert("", tk.END, values=values, tags=tags)
+            self._row_keys[row_id] = ("set", base_name)
+            self._set_rows[base_name] = row_id
+            self._set_items[row_id] = items
+            
+            if base_name in self._open_sets:
+                for item in items:
+                    self._insert_item_row(row_id, item, prices)
+                self.tree.item(row_id, open=True)
+            else:
+                # Placeholder child so the row gets an expand arrow; real rows are built on first open
+                self.tree.insert(row_id, tk.END, values=("", "", "", "", ""), tags=("normal",))
+                self._pending_children[row_id] = items
+    
+    def _update_set_row(self, base_name):
+        row_id = self._set_rows.get(base_name)
+        if row_id is None:
+            return
+        values, tags = self._set_row_values(base_name, self._set_items[row_id])
+        self.tree.item(row_id, values=values, tags=tags)
+    
+    def on_set_open(self, event=None):
+        row_id = self.tree.focus()
+        row_key = self._row_keys.get(row_id)
+        if row_key is None or row_key[0] != "set":
+            return
+        self._open_sets.add(row_key[1])
         
-        return False
+        items = self._pending_children.pop(row_id, None)
+        if items is None:
+            return
+        for child_id in self.tree.get_children(row_id):
+            self.tree.delete(child_id)
+        for item in items:
+            self._insert_item_row(row_id, item)
+    
+    def on_set_close(self, event=None):
+        row_key = self._row_keys.get(self.tree.focus())
+        if row_key is not None and row_key[0] == "set":
+            self._open_sets.discard(row_key[1])
+    
+    def is_item_marked(self, item_name, base_name=None):
+        return self.marks.is_marked(item_name, base_name) or self.price_filter.is_marked(item_name)
     
     def on_item_click(self, event):
         item = self.tree.identify_row(event.y)
@@ -1500,56 +1589,50 @@ class Ducanator:
         
         self.tree.selection_set(item)
         
-        values = self.tree.item(item, "values")
-        tags = self.tree.item(item, "tags")
+        row_key = self._row_keys.get(item)
+        if row_key is None:
+            return
         
-        if values:
-            item_name = values[0]
-            
-            if "separator" in tags or item_name.startswith("---"):
-                base_name = item_name.replace("---", "").strip()
-                base_marker = f"BASE:{base_name}"
-                
-                if base_marker in self.marked_items:
-                    self.marked_items.remove(base_marker)
-                    items_to_remove = [name for name in self.marked_items 
-                                     if name.startswith(base_name + " ")]
-                    for name in items_to_remove:
-                        self.marked_items.remove(name)
-                else:
-                    self.marked_items.add(base_marker)
-                    for inv_item in self.inventory_data:
-                        if inv_item.get("base_name") == base_name:
-                            component_name = inv_item.get("name")
-                            if component_name:
-                                self.marked_items.add(component_name)
-                
-                self.save_marked_items()
-                self.refresh_display()
-                return
-            
-            base_name = None
-            for inv_item in self.inventory_data:
-                if inv_item.get("name") == item_name:
-                    base_name = inv_item.get("base_name")
-                    break
-            
-            if item_name in self.marked_items:
-                self.marked_items.remove(item_name)
-            else:
-                self.marked_items.add(item_name)
-            
+        row_type, item_name = row_key
+        if row_type == "set":
+            base_name = item_name
+            self.marks.toggle_set(base_name)
+            self._sync_marks(self.marks.components_of.get(base_name, ()))
             self.save_marked_items()
             self.refresh_display()
+            return
+        
+        if self.price_filter.is_marked(item_name) and not self.marks.is_marked(item_name):
+            self.price_filter.exclude(item_name)
+            self._sync_marks((item_name,))
+            self.refresh_display()
+            return
+        
+        if not self.marks.toggle_item(item_name):
+            # A manual unmark also lifts the price filter's mark, so one click unmarks the row
+            self.price_filter.exclude(item_name)
+        self._sync_marks((item_name,))
+        self.save_marked_items()
+        self.refresh_display()
     
     def clear_all_marks(self):
-        self.marked_items.clear()
+        affected = set(self.marks.marked_components) | self.price_filter.marked
+        for base_name in self.marks.marked_sets:
+            affected.update(self.marks.components_of.get(base_name, ()))
+        self.marks.clear()
+        self.price_filter.exclude_all()
+        self._sync_marks(affected)
         self.save_marked_items()
         self.refresh_display()
 
+memory.register("view", Ducanator.refresh_display, Ducanator._render_flat, Ducanator._render_grouped, Ducanator._insert_item_row)
+
 def main():
+    if "--memory-report" in sys.argv[1:]:
+        memory.start()
+    startup_timer = StartupTimer(enabled="--startup-timing" in sys.argv[1:])
     root = tk.Tk()
-    app = Ducanator(root)
+    app = Ducanator(root, startup_timer)
     root.mainloop()
 
 if __name__ == "__main__":
@@ -0,0 +1,268 @@
+import argparse
+import hashlib
+import json
+import os
+import random
+import sys
+import threading
+import time
+import urllib.request
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import ducanator_core
+
+ORDERS_PREFIX = "/v2/orders/item/"
+
+class MarketBehaviour:
+    def __init__(self, recordings_dir=None, latency=0.0, jitter=0.0, error_rate=0.0,
+                 rate_limit=None, retry_after=1, synthesize=True, seed=None):
+        self.recordings_dir = recordings_dir
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self.retry_after = retry_after
+        self.synthesize = synthesize
+        self.random = random.Random(seed)
+        self.stats = {"requests": 0, "200": 0, "304": 0, "404": 0, "429": 0, "5xx": 0}
+        self._recent = []
+        self._lock = threading.Lock()
+    
+    def payload_for(self, slug):
+        if self.recordings_dir:
+            path = os.path.join(self.recordings_dir, f"{slug}.json")
+            if os.path.exists(path):
+                with open(path, 'rb') as f:
+                    return f.read()
+        if not self.synthesize:
+            return None
+        
+        # Deterministic per slug, so repeated requests can be answered with a 304
+        rnd = random.Random(slug)
+        base = rnd.randint(3, 60)
+        orders = []
+        for _ in range(rnd.randint(5, 40)):
+            orders.append({
+                "type": "sell",
+                "visible": True,
+                "platinum": max(1, int(base * rnd.uniform(0.8, 1.6)))
+            })
+        for _ in range(rnd.randint(0, 10)):
+            orders.append({
+                "type": "buy",
+                "visible": True,
+                "platinum": max(1, int(base * rnd.uniform(0.4, 0.9)))
+            })
+        return json.dumps({"apiVersion": "mock", "data": orders, "error": None}).encode('utf-8')
+    
+    def decide(self):
+        with self._lock:
+            self.stats["requests"] += 1
+            now = time.monotonic()
+            if self.rate_limit:
+                self._recent = [t for t in self._recent if now - t < 1.0]
+                if len(self._recent) >= self.rate_limit:
+                    self.stats["429"] += 1
+                    return 429
+                self._recent.append(now)
+            if self.error_rate and self.random.random() < self.error_rate:
+                self.stats["5xx"] += 1
+                return self.random.choice((500, 502, 503))
+            delay = self.latency + (self.random.uniform(0, self.jitter) if self.jitter else 0)
+        if delay > 0:
+            time.sleep(delay)
+        return 200
+    
+    def count(self, key):
+        with self._lock:
+            self.stats[key] += 1
+
+def make_handler(behaviour):
+    class MockMarketHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        
+        def log_message(self, format, *args):
+            pass
+        
+        def _send(self, code, body=b"", headers=None):
+            self.send_response(code)
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            if body:
+                self.wfile.write(body)
+        
+        def do_GET(self):
+            path = self.path.split('?', 1)[0]
+            if not path.startswith(ORDERS_PREFIX):
+                behaviour.count("404")
+                self._send(404)
+                return
+            
+            code = behaviour.decide()
+            if code == 429:
+                self._send(429, headers={"Retry-After": str(behaviour.retry_after)})
+                return
+            if code != 200:
+                self._send(code)
+                return
+            
+            body = behaviour.payload_for(path[len(ORDERS_PREFIX):])
+            if body is None:
+                behaviour.count("404")
+                self._send(404, json.dumps({"error": "not found"}).encode('utf-8'))
+                return
+            
+            etag = '"%s"' % hashlib.sha1(body).hexdigest()
+            if self.headers.get("If-None-Match") == etag:
+                behaviour.count("304")
+                self._send(304, headers={"ETag": etag})
+                return
+            
+            behaviour.count("200")
+            self._send(200, body, {"Content-Type": "application/json", "ETag": etag})
+    
+    return MockMarketHandler
+
+def start_server(behaviour, host="127.0.0.1", port=0):
+    server = ThreadingHTTPServer((host, port), make_handler(behaviour))
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, name="mock-market", daemon=True)
+    thread.start()
+    return server
+
+def base_url_of(server):
+    host, port = server.server_address[:2]
+    return f"http://{host}:{port}/v2"
+
+def behaviour_from_args(args):
+    return MarketBehaviour(
+        recordings_dir=args.recordings,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        rate_limit=args.rate_limit,
+        retry_after=args.retry_after,
+        synthesize=not args.strict,
+        seed=args.seed
+    )
+
+def cmd_serve(args):
+    server = start_server(behaviour_from_args(args), args.host, args.port)
+    print(f"Mock market listening on {base_url_of(server)}")
+    print(f'Point the app at it with {{"market_api_url": "{base_url_of(server)}"}} in settings.json')
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+def cmd_record(args):
+    with open(args.price_cache, 'r', encoding='utf-8') as f:
+        item_names = sorted(json.load(f))
+    if args.limit:
+        item_names = item_names[:args.limit]
+    
+    os.makedirs(args.out, exist_ok=True)
+    recorded = 0
+    for item_name in item_names:
+        slug = ducanator_core.item_name_to_slug(item_name)
+        if not slug:
+            continue
+        url = f"{args.source.rstrip('/')}/orders/item/{slug}"
+        req = urllib.request.Request(url, headers={'User-Agent': 'Ducanator/1.0', 'Accept': 'application/json'})
+        try:
+            with urllib.request.urlopen(req, timeout=10) as response:
+                body = response.read()
+        except Exception as e:
+            print(f"Error recording {slug}: {e}")
+            continue
+        with open(os.path.join(args.out, f"{slug}.json"), 'wb') as f:
+            f.write(body)
+        recorded += 1
+        time.sleep(1.0 / args.rate)
+    print(f"Recorded {recorded} payloads to {args.out}")
+
+def run_benchmark(behaviour, item_names, rate, passes=2, workers=None):
+    server = start_server(behaviour)
+    try:
+        source = ducanator_core.MarketPriceSource(base_url_of(server))
+        fetcher = ducanator_core.PriceFetcher(source, rate=rate, slug_result_ttl=0)
+        if workers:
+            fetcher.WORKERS = workers
+        results = []
+        for index in range(passes):
+            before = dict(behaviour.stats)
+            start = time.perf_counter()
+            priced = fetcher.fetch_many(item_names, force_refresh=True)
+            elapsed = time.perf_counter() - start
+            results.append({
+                "pass": index + 1,
+                "items": len(item_names),
+                "priced": priced,
+                "seconds": round(elapsed, 3),
+                "items_per_second": round(len(item_names) / elapsed, 2) if elapsed else None,
+                "responses": {key: behaviour.stats[key] - before[key] for key in behaviour.stats},
+                "final_rate": round(fetcher.rate_limiter.rate, 3)
+            })
+        return results
+    finally:
+        server.shutdown()
+
+def cmd_bench(args):
+    if args.items_from:
+        with open(args.items_from, 'r', encoding='utf-8') as f:
+            item_names = sorted(json.load(f))
+    else:
+        item_names = [f"Mock{i} Prime Blueprint" for i in range(args.items)]
+    if args.items:
+        item_names = item_names[:args.items]
+    
+    results = run_benchmark(behaviour_from_args(args), item_names, args.rate, args.passes, args.workers)
+    json.dump(results, sys.stdout, indent=2)
+    print()
+
+def add_behaviour_args(parser):
+    parser.add_argument("--recordings", help="directory of recorded <slug>.json payloads to replay")
+    parser.add_argument("--latency", type=float, default=0.05, help="base response latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.02, help="extra random latency in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with a 5xx")
+    parser.add_argument("--rate-limit", type=int, default=None, help="requests per second before answering 429")
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After seconds sent with 429")
+    parser.add_argument("--strict", action="store_true", help="404 for slugs without a recording instead of synthesizing")
+    parser.add_argument("--seed", type=int, default=None)
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the warframe.market orders API")
+    commands = parser.add_subparsers(dest="command")
+    commands.required = True
+    
+    serve = commands.add_parser("serve", help="run the mock market until interrupted")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8765)
+    add_behaviour_args(serve)
+    serve.set_defaults(func=cmd_serve)
+    
+    record = commands.add_parser("record", help="record live order payloads for replay")
+    record.add_argument("--out", default="recordings")
+    record.add_argument("--price-cache", default=os.path.join("cachedData", "price_cache.json"))
+    record.add_argument("--source", default="https://api.warframe.market/v2")
+    record.add_argument("--rate", type=float, default=3.0)
+    record.add_argument("--limit", type=int, default=None)
+    record.set_defaults(func=cmd_record)
+    
+    bench = commands.add_parser("bench", help="time the fetch pipeline against an in-process mock market")
+    bench.add_argument("--items", type=int, default=200)
+    bench.add_argument("--items-from", help="price_cache.json whose item names to fetch")
+    bench.add_argument("--rate", type=float, default=3.0, help="client request rate")
+    bench.add_argument("--passes", type=int, default=2, help="later passes exercise conditional requests")
+    bench.add_argument("--workers", type=int, default=None)
+    add_behaviour_args(bench)
+    bench.set_defaults(func=cmd_bench)
+    
+    args = parser.parse_args()
+    args.func(args)
+
+if __name__ == "__main__":
+    main()